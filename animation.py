@@ -0,0 +1,36 @@
+import pygame
+
+
+def slice_strip(image, frame_width=None):
+    """Cut a horizontal strip into frames. Strips are square frames unless frame_width is given"""
+    width, height = image.get_size()
+    if frame_width is None:
+        frame_width = height if width > height and width % height == 0 else width
+    return tuple(image.subsurface((x, 0, frame_width, height))
+                 for x in range(0, width - frame_width + 1, frame_width))
+
+
+class Animation:
+    """Precomputed frames for one state, facing right and left, indexed by elapsed time"""
+    __slots__ = ("frames", "flipped", "frame_ms", "loop", "duration")
+
+    def __init__(self, frames, frame_ms=100, loop=True):
+        self.frames = frames
+        self.flipped = tuple(pygame.transform.flip(frame, True, False) for frame in frames)
+        self.frame_ms = frame_ms
+        self.loop = loop
+        self.duration = frame_ms * len(frames)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def frame(self, elapsed, facing_right=True):
+        index = int(elapsed // self.frame_ms)
+        if self.loop:
+            index %= len(self.frames)
+        elif index >= len(self.frames):
+            index = len(self.frames) - 1  # One-shot animations hold their last frame
+        return self.frames[index] if facing_right else self.flipped[index]
+
+    def finished(self, elapsed):
+        return not self.loop and elapsed >= self.duration
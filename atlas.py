@@ -0,0 +1,154 @@
+import json
+import os
+import struct
+import sys
+
+import pygame
+
+# Bundle layout: magic, index length, JSON index, then raw RGBA sheets back to back
+ATLAS_MAGIC = b"AOHATLS1"
+ATLAS_FILE = "assets.atlas"
+MAX_SHEET_SIZE = 2048
+PADDING = 1
+
+# Sprite folders packed into the atlas
+SPRITE_DIRS = ["player1", "player2", "zombie1", "zombie2", "zombie3",
+               "bosses", "coins", "weapon_seller"]
+
+
+def asset_path(base_dir, path):
+    """File for a game asset path like "assets/zombie1/Walk.png".
+
+    The sprite folders sit either in an assets/ folder or straight next to the
+    scripts, as they do in this repository.
+    """
+    full = os.path.join(base_dir, path)
+    if not os.path.exists(full) and path.startswith("assets/"):
+        beside = os.path.join(base_dir, path[len("assets/"):])
+        if os.path.exists(beside):
+            return beside
+    return full
+
+
+def pack_shelves(sizes, max_size=MAX_SHEET_SIZE):
+    """Shelf-pack (name, w, h) boxes, tallest first. Returns {name: (sheet, x, y)} and sheet sizes"""
+    placements = {}
+    sheets = []
+    x = y = shelf_height = sheet_width = 0
+    for name, w, h in sorted(sizes, key=lambda item: (-item[2], -item[1])):
+        if w > max_size or h > max_size:
+            raise ValueError(f"{name} ({w}x{h}) does not fit in a {max_size}px sheet")
+        if x + w > max_size:
+            y += shelf_height + PADDING
+            x = shelf_height = 0
+        if y + h > max_size or not sheets:
+            if sheets:
+                sheets[-1] = (sheet_width, y)
+            sheets.append(None)
+            x = y = shelf_height = sheet_width = 0
+        placements[name] = (len(sheets) - 1, x, y)
+        x += w + PADDING
+        shelf_height = max(shelf_height, h)
+        sheet_width = max(sheet_width, x)
+    if sheets:
+        sheets[-1] = (sheet_width, y + shelf_height)
+    return placements, sheets
+
+
+def build_atlas(source_dir, out_path, sprite_dirs=SPRITE_DIRS):
+    """Pack every sprite under source_dir into sheets and write them as one bundle.
+
+    Folders are found the way the game finds them (see asset_path). Raises
+    ValueError, without writing anything, when there is nothing to pack.
+    """
+    images = {}
+    for sprite_dir in sprite_dirs:
+        folder = asset_path(source_dir, f"assets/{sprite_dir}")
+        if not os.path.isdir(folder):
+            print(f"Skipping missing sprite folder {folder}")
+            continue
+        for filename in sorted(os.listdir(folder)):
+            if not filename.lower().endswith(".png"):
+                continue
+            images[f"assets/{sprite_dir}/{filename}"] = pygame.image.load(os.path.join(folder, filename))
+    if not images:
+        raise ValueError(f"no sprites found under {source_dir}")
+
+    placements, sheet_sizes = pack_shelves(
+        [(name, image.get_width(), image.get_height()) for name, image in images.items()])
+
+    sheets = [pygame.Surface(size, pygame.SRCALPHA, 32) for size in sheet_sizes]
+    sprites = {}
+    for name, image in images.items():
+        sheet, x, y = placements[name]
+        w, h = image.get_size()
+        sheets[sheet].blit(image, (x, y))
+        sprites[name] = {"sheet": sheet, "rect": [x, y, w, h]}
+
+    index = {"sheets": [], "sprites": sprites}
+    blobs = []
+    offset = 0
+    for sheet in sheets:
+        data = pygame.image.tobytes(sheet, "RGBA")
+        index["sheets"].append({"size": list(sheet.get_size()), "offset": offset})
+        blobs.append(data)
+        offset += len(data)
+
+    index_bytes = json.dumps(index, separators=(",", ":")).encode("utf-8")
+    with open(out_path, "wb") as f:
+        f.write(ATLAS_MAGIC)
+        f.write(struct.pack("<I", len(index_bytes)))
+        f.write(index_bytes)
+        for data in blobs:
+            f.write(data)
+    return len(sprites), len(sheets)
+
+
+class Atlas:
+    """Packed sprite sheets plus their index, handing out sub-surfaces by name"""
+    def __init__(self, sheets, sprites):
+        self.sheets = sheets
+        self.sprites = sprites
+
+    def __contains__(self, name):
+        return name in self.sprites
+
+    def __len__(self):
+        return len(self.sprites)
+
+    def get(self, name):
+        entry = self.sprites[name]
+        return self.sheets[entry["sheet"]].subsurface(pygame.Rect(entry["rect"]))
+
+
+def load_atlas(path):
+    """Read a bundle written by build_atlas. Needs a display mode for convert_alpha"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:len(ATLAS_MAGIC)] != ATLAS_MAGIC:
+        raise ValueError(f"{path} is not an atlas bundle")
+    start = len(ATLAS_MAGIC)
+    (index_len,) = struct.unpack_from("<I", data, start)
+    start += 4
+    index = json.loads(data[start:start + index_len].decode("utf-8"))
+    start += index_len
+
+    view = memoryview(data)
+    sheets = []
+    for sheet in index["sheets"]:
+        w, h = sheet["size"]
+        begin = start + sheet["offset"]
+        raw = view[begin:begin + w * h * 4]
+        sheets.append(pygame.image.frombuffer(raw, (w, h), "RGBA").convert_alpha())
+    return Atlas(sheets, index["sprites"])
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    source = sys.argv[1] if len(sys.argv) > 1 else script_dir
+    out = sys.argv[2] if len(sys.argv) > 2 else os.path.join(script_dir, ATLAS_FILE)
+    try:
+        count, sheet_count = build_atlas(source, out)
+    except ValueError as e:
+        sys.exit(f"atlas.py: {e}")
+    print(f"Packed {count} sprites into {sheet_count} sheet(s) -> {out}")
@@ -1,22 +1,70 @@
+import time
+STARTUP_T0 = time.perf_counter()  # Taken before the heavy imports, for --startup-report
+
 import pygame
 import sys
 import random
 import math
 import os
+import gc
+from collections import OrderedDict
+
+from animation import Animation, slice_strip
+from atlas import ATLAS_FILE, asset_path, load_atlas
+from collision import MaskCollider
+from flowfield import FlowField
+from fonts import FONT_CACHE_FILE, FontCache
+from lod import MAX_CATCHUP_STEPS, AIScheduler
+from pickups import CoinManager
+from profiler import FrameProfiler, StartupTimer
+from projectiles import ProjectilePool
+from render import DirtyRenderer, RenderTarget, draw_rect, open_display, present, to_logical
+from replay import FLAG_LOD, FLAG_SWARM, Recorder
+from spatial import SpatialGrid
+from streaming import AssetStreamer
 
-# Initialize pygame
-pygame.font.init()
-pygame.init()
+try:
+    from swarm import IMAGE_DEAD, IMAGE_HURT, IMAGE_STATES, STATE_DEAD, STATE_NAMES, ZombieSwarm
+except ImportError:  # NumPy is optional
+    ZombieSwarm = None
+
+# Headless runs use SDL's dummy video driver so no window is needed
+if "--headless" in sys.argv:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
 
 # Constants
 SCREEN_WIDTH, SCREEN_HEIGHT = 800, 600
-FPS = 60
+FPS = 60  # Simulation rate
+SIM_DT = 1000 / FPS
+MAX_STEPS_PER_FRAME = 5  # Catch-up cap; any further backlog is dropped
 WHITE = (255, 255, 255)
 RED = (255, 0, 0)
 GREEN = (0, 255, 0)
 YELLOW = (255, 255, 0)
 BLACK = (0, 0, 0)
 INVULNERABILITY_TIME = 1000
+COIN_LIFETIME = 10000  # 10 seconds
+COIN_MERGE_RADIUS = 40  # Drops this close to a coin of the same type join its stack
+GRID_CELL_SIZE = 128
+FLOW_CELL_SIZE = 40
+USE_SWARM = "--swarm" in sys.argv and ZombieSwarm is not None
+USE_DIRTY_RECTS = "--dirty-rects" in sys.argv
+USE_LOD = "--lod" in sys.argv
+
+def cli_option(name, default=None):
+    """Value following name on the command line, e.g. --render-fps 144"""
+    if name not in sys.argv:
+        return default
+    index = sys.argv.index(name)
+    return sys.argv[index + 1] if index + 1 < len(sys.argv) else default
+
+# Frames drawn per second; defaults to the simulation rate, higher caps (or 0, uncapped) are opt-in
+RENDER_FPS = int(cli_option("--render-fps", FPS))
+# Internal render resolution, e.g. --render-size 400x300; the game still works in 800x600 units
+RENDER_SIZE = tuple(int(n) for n in cli_option("--render-size", f"{SCREEN_WIDTH}x{SCREEN_HEIGHT}").split("x"))
+SCALE_MODE = cli_option("--scale-mode", "scaled")  # Or "integer" for whole-pixel software scaling
+FULLSCREEN = "--fullscreen" in sys.argv
+AI_BUDGET = int(cli_option("--ai-budget", 200))  # Off-screen zombie updates per tick with --lod
 
 # Stage configuration
 STAGE_ZOMBIE_COUNTS = {
@@ -33,6 +81,67 @@ STAGE_BOSSES = {
     5: "assets/bosses/boss3"
 }
 
+STAGE_MAPS = {
+    1: "assets/map/class_map.png",
+    2: "assets/map/hallways-map.png",
+    3: "assets/map/toilet-map.png",
+    4: "assets/map/class-map.png",
+    5: "assets/map/hallways-map.png"
+}
+TITLE_SCREEN = "assets/other/title-screen.png"
+
+# Wave balance: per-stage values are base + stage * per_stage. farm.py sweeps these
+BALANCE = {
+    "zombie_count_scale": 1.0,  # Multiplies STAGE_ZOMBIE_COUNTS
+    "zombie_health": 80, "zombie_health_per_stage": 20,
+    "zombie_damage": 5, "zombie_damage_per_stage": 2,
+    "zombie_speed": 1, "zombie_speed_per_stage": 0.2,
+    "boss_health": 300, "boss_health_per_stage": 50,
+    "boss_damage": 20, "boss_damage_per_stage": 5,
+    "boss_speed": 1.5, "boss_speed_per_stage": 0.1,
+    "bosses": 1,  # 0 turns STAGE_BOSSES off
+    "spawn_interval": 2000, "spawn_interval_step": 300, "spawn_interval_min": 500
+}
+
+# Animations: state -> (sprite file, ms per frame, loops)
+ZOMBIE_ANIMATIONS = {
+    "Idle": ("Idle", 150, True),
+    "Walk": ("Walk", 100, True),
+    "Attack": ("Attack", 100, False),
+    "Hurt": ("Hurt", 100, False),
+    "Dead": ("Dead", 120, False)
+}
+
+PLAYER_ANIMATIONS = {
+    1: {
+        "Idle": ("Idle", 150, True),
+        "Walk": ("Walk", 100, True),
+        "Run": ("Run", 80, True),
+        "Attack": ("Attack_1", 70, False),
+        "Hurt": ("Hurt", 100, False),
+        "Dead": ("Dead", 120, False)
+    },
+    2: {
+        "Idle": ("Idle", 150, True),
+        "Walk": ("Walk", 100, True),
+        "Run": ("Run", 80, True),
+        "Attack": ("Attack", 70, False),
+        "Shot": ("Shot", 70, False),
+        "Recharge": ("Recharge", 100, False),
+        "Hurt": ("Hurt", 100, False),
+        "Dead": ("Dead", 120, False)
+    }
+}
+PLAYER_HURT_TIME = 300
+
+# Player 2's gun
+SHOT_SPEED = 20  # Pixels per step
+SHOT_RANGE = 800  # Pixels
+SHOT_COOLDOWN = 250
+MAGAZINE_SIZE = 6
+RELOAD_TIME = 1000
+PROJECTILE_CAPACITY = 256
+
 # Player controls
 PLAYER1_UP, PLAYER1_DOWN = pygame.K_UP, pygame.K_DOWN
 PLAYER1_LEFT, PLAYER1_RIGHT = pygame.K_LEFT, pygame.K_RIGHT
@@ -40,28 +149,85 @@ PLAYER1_ATTACK = pygame.K_m
 PLAYER2_UP, PLAYER2_DOWN = pygame.K_z, pygame.K_s
 PLAYER2_LEFT, PLAYER2_RIGHT = pygame.K_q, pygame.K_d
 PLAYER2_ATTACK = pygame.K_a
+# Bit order of the key masks in replay recordings; only append to this
+RECORDED_KEYS = [PLAYER1_UP, PLAYER1_DOWN, PLAYER1_LEFT, PLAYER1_RIGHT, PLAYER1_ATTACK,
+                 PLAYER2_UP, PLAYER2_DOWN, PLAYER2_LEFT, PLAYER2_RIGHT, PLAYER2_ATTACK]
 
-# Setup screen
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Attack On Heec")
+# The window and fonts are created by init(), not at import
+screen = None
 clock = pygame.time.Clock()
 
 # Game states
 MENU, PLAYING, GAME_OVER, STAGE_TRANSITION = 0, 1, 2, 3
-current_state = MENU
 
-# Font setup
-title_font = pygame.font.SysFont("Arial", 64)
-button_font = pygame.font.SysFont("Arial", 32)
-font_small = pygame.font.SysFont("Arial", 16)
-font_medium = pygame.font.SysFont("Arial", 24)
-font_large = pygame.font.SysFont("Arial", 32)
+# Navigation grid for flow fields, with room for zombies spawning off screen
+FLOW_BOUNDS = pygame.Rect(-160, -160, SCREEN_WIDTH + 320, SCREEN_HEIGHT + 320)
+# Zombies overlapping this run their AI every tick under --lod
+AI_VIEW = pygame.Rect(-20, -20, SCREEN_WIDTH + 40, SCREEN_HEIGHT + 40)
+
+# Fonts, set by init(); matched font files are remembered across runs
+title_font = button_font = font_small = font_medium = font_large = None
+font_cache = FontCache(os.path.join(os.path.dirname(os.path.abspath(__file__)), FONT_CACHE_FILE))
+
+# Frame phase timings; off unless --profile is given or the overlay is toggled with F3
+profiler = FrameProfiler()
+if "--profile" in sys.argv:
+    profiler.enable()
+startup = StartupTimer(STARTUP_T0)
+LOAD_SLICE_MS = 8  # Asset loading done per menu frame while the game starts up
+
+def init():
+    """Initialise pygame, open the window and load the fonts. Safe to call more than once"""
+    global screen, title_font, button_font, font_small, font_medium, font_large
+    if screen is not None:
+        return screen
+    startup.mark("import")
+    pygame.init()
+    screen = open_display((SCREEN_WIDTH, SCREEN_HEIGHT), RENDER_SIZE, SCALE_MODE, FULLSCREEN)
+    pygame.display.set_caption("Attack On Heec")
+    startup.mark("display")
+    title_font = font_cache.font("Arial", 64)
+    button_font = font_cache.font("Arial", 32)
+    font_small = font_cache.font("Arial", 16)
+    font_medium = font_cache.font("Arial", 24)
+    font_large = font_cache.font("Arial", 32)
+    font_cache.save()
+    startup.mark("fonts")
+    return screen
+
+# Packed sprite atlas built by atlas.py, loaded after the display is set up
+atlas = None
+
+def load_sprite_atlas():
+    """Load the prebuilt atlas if there is one, otherwise keep loading loose PNGs"""
+    global atlas
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    atlas_path = os.path.join(script_dir, ATLAS_FILE)
+    if not os.path.exists(atlas_path):
+        return
+    try:
+        atlas = load_atlas(atlas_path)
+    except Exception as e:
+        print(f"Failed to load atlas {atlas_path}: {e}")
+        return
+    if not len(atlas):
+        print(f"Atlas {atlas_path} has no sprites; loading loose PNGs instead")
+        atlas = None
 
 def load_image(path, scale=1.0):
     """Load a single image with optional scaling"""
+    profiler.count("load_image")
+    if atlas is not None:
+        if path in atlas:
+            image = atlas.get(path)
+            if scale != 1.0:
+                new_size = (int(image.get_width() * scale),
+                           int(image.get_height() * scale))
+                image = pygame.transform.scale(image, new_size)
+            return image
     try:
         script_dir = os.path.dirname(os.path.abspath(__file__))
-        abs_path = os.path.join(script_dir, path)
+        abs_path = asset_path(script_dir, path)
         image = pygame.image.load(abs_path).convert_alpha()
         if scale != 1.0:
             new_size = (int(image.get_width() * scale), 
@@ -81,6 +247,107 @@ def load_image(path, scale=1.0):
             placeholder.fill((150, 150, 150, 255))
         return placeholder
 
+# Maps and the title screen are decoded off the main thread, within --asset-budget MB
+asset_streamer = AssetStreamer(os.path.dirname(os.path.abspath(__file__)),
+                               budget=int(cli_option("--asset-budget", 32)) * 1024 * 1024,
+                               cache_dir=cli_option("--asset-cache"))
+
+class SpriteCache:
+    """Loaded sprites keyed by (sprite dir, state, scale, facing), each built only once"""
+    def __init__(self):
+        self.surfaces = {}
+        self.animation_sets = {}
+
+    def get(self, sprite_dir, state, scale=1.0, facing_right=True):
+        key = (sprite_dir, state, scale, facing_right)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            if not facing_right:
+                surface = pygame.transform.flip(self.get(sprite_dir, state, scale), True, False)
+            elif isinstance(scale, tuple):
+                # Fixed target size (coins) rather than a scale factor
+                surface = pygame.transform.scale(load_image(f"assets/{sprite_dir}/{state}.png"), scale)
+            else:
+                surface = load_image(f"assets/{sprite_dir}/{state}.png", scale)
+            self.surfaces[key] = surface
+        return surface
+
+    def animations(self, sprite_dir, table, scale=1.0):
+        """{state: Animation} for a table of {state: (sprite file, frame ms, loops)}, sliced once"""
+        key = (sprite_dir, scale)
+        animations = self.animation_sets.get(key)
+        if animations is None:
+            animations = {state: Animation(slice_strip(self.get(sprite_dir, name, scale)), frame_ms, loop)
+                          for state, (name, frame_ms, loop) in table.items()}
+            self.animation_sets[key] = animations
+        return animations
+
+sprite_cache = SpriteCache()
+
+# Hit masks for every sprite frame, built once per frame surface
+collider = MaskCollider()
+
+class TextCache:
+    """Rendered text keyed by (font, text, colour); least recently used entries are evicted first"""
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = font.render(text, True, color)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.max_entries:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+text_cache = TextCache()
+
+# Health bar styles: width, height, fill, background, border colour, border width, fill levels
+HEALTH_BAR_STYLES = {
+    "zombie": (40, 5, (0, 255, 0), (60, 60, 60), (255, 255, 255), 1, 20),
+    "boss": (60, 5, (255, 215, 0), (60, 60, 60), (255, 255, 255), 1, 30),
+    "player": (200, 20, GREEN, RED, WHITE, 2, 100),
+}
+
+class HealthBarCache:
+    """Prerendered health bars keyed by (style, fill level); each level is drawn once"""
+    def __init__(self, styles):
+        self.styles = styles
+        self.surfaces = {}
+
+    def level(self, style, health, max_health):
+        """Which of the style's fill levels health falls in"""
+        levels = self.styles[style][6]
+        return min(levels, max(0, int(levels * health / max_health)))
+
+    def get(self, style, health, max_health):
+        key = (style, self.level(style, health, max_health))
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.build(style, key[1])
+            self.surfaces[key] = surface
+        return surface
+
+    def build(self, style, level):
+        width, height, fill, background, border, border_width, levels = self.styles[style]
+        surface = pygame.Surface((width, height))
+        surface.fill(background)
+        surface.fill(fill, (0, 0, width * level // levels, height))
+        pygame.draw.rect(surface, border, (0, 0, width, height), border_width)
+        return surface
+
+    def prerender(self):
+        for style, spec in self.styles.items():
+            for level in range(spec[6] + 1):
+                self.surfaces[(style, level)] = self.build(style, level)
+
+health_bar_cache = HealthBarCache(HEALTH_BAR_STYLES)
+
 class Weapon:
     def __init__(self, name, price, damage, image_path=None):
         self.name = name
@@ -92,29 +359,54 @@ class Weapon:
         screen.blit(self.image, (x, y))
 
     def get_info_text(self, font):
-        return font.render(f"{self.name}: {self.damage} DMG - {self.price} Coins", True, WHITE)
+        return text_cache.render(font, f"{self.name}: {self.damage} DMG - {self.price} Coins", WHITE)
+
+def interpolate_rect(rect, prev_pos, alpha):
+    """Where to draw rect between the previous simulation step (alpha 0) and the current one (1)"""
+    if alpha >= 1.0 or prev_pos == rect.topleft:
+        return rect
+    px, py = prev_pos
+    return pygame.Rect(round(px + (rect.x - px) * alpha), round(py + (rect.y - py) * alpha),
+                       rect.width, rect.height)
+
+def swap_remove(items, entity):
+    """O(1) removal from a list whose entities track their own index in it"""
+    last = items.pop()
+    if last is not entity:
+        items[entity.index] = last
+        last.index = entity.index
+    entity.index = -1
 
 class Coin:
+    __slots__ = ("screen", "coin_type", "value", "image", "rect", "expires_at", "stack", "index", "uid")
+
     def __init__(self, screen, x, y, coin_type=1):
         self.screen = screen
+        self.index = -1
+        self.reset(x, y, coin_type)
+
+    def reset(self, x, y, coin_type=1):
+        """(Re)initialise a coin; pooled coins are recycled through here"""
         self.coin_type = coin_type
         self.value = {1: 150, 2: 100, 3: 50}.get(coin_type, 50)
-        self.image = load_image(f"assets/coins/Coin{coin_type}.png")
-        self.image = pygame.transform.scale(self.image, (30, 30))
+        self.image = sprite_cache.get("coins", f"Coin{coin_type}", (30, 30))
         self.rect = self.image.get_rect(center=(x, y))
-        self.lifetime = 10000  # 10 seconds
-
-    def update(self, dt):
-        self.lifetime -= dt
-        return self.lifetime > 0
+        self.expires_at = 0  # Clock time, set by the CoinManager
+        self.stack = 1  # Drops merged into this coin
 
     def draw(self):
         self.screen.blit(self.image, self.rect)
 
+    def render_state(self):
+        # Swap-removal moves coins within the list, which changes what they paint over
+        return self.rect.copy(), (id(self.image), self.index)
+
 class Player:
-    def __init__(self, screen, x, y, health, damage, speed, player_num):
-        self.screen = screen
+    def __init__(self, game, x, y, health, damage, speed, player_num):
+        self.game = game
+        self.screen = game.screen
         self.rect = pygame.Rect(x, y, 50, 50)
+        self.prev_pos = self.rect.topleft
         self.health = health
         self.max_health = health
         self.damage = damage
@@ -122,7 +414,10 @@ class Player:
         self.player_num = player_num
         self.coins = 0
         self.facing_right = True
-        self.image = load_image(f"assets/player{player_num}/Idle.png")
+        self.animations = sprite_cache.animations(f"player{player_num}", PLAYER_ANIMATIONS[player_num])
+        self.image_state = "Idle"
+        self.anim_start = game.clock.get_ticks()
+        self.image = self.animations["Idle"].frame(0)
         
         # Controls
         if player_num == 1:
@@ -139,8 +434,12 @@ class Player:
             self.attack_key = PLAYER2_ATTACK
         
         self.attacking = False
-        self.attack_cooldown = 500
+        # Player 2 shoots instead of swinging, and reloads after every magazine
+        self.shooter = player_num == 2
+        self.attack_cooldown = SHOT_COOLDOWN if self.shooter else 500
         self.last_attack_time = 0
+        self.ammo = MAGAZINE_SIZE
+        self.reload_start = None
         self.invulnerable = False
         self.last_hit_time = 0
         self.flicker = False
@@ -150,8 +449,9 @@ class Player:
     def is_vulnerable(self):
         return not self.invulnerable
 
-    def update(self):
-        current_time = pygame.time.get_ticks()
+    def update(self, keys):
+        self.prev_pos = self.rect.topleft
+        current_time = self.game.clock.get_ticks()
         if self.invulnerable and current_time - self.last_hit_time > INVULNERABILITY_TIME:
             self.invulnerable = False
             
@@ -161,7 +461,41 @@ class Player:
                 self.flicker = not self.flicker
                 self.flicker_counter = 0
         
-        keys = pygame.key.get_pressed()
+        moving = self.move(keys)
+        
+        if self.reload_start is not None and current_time - self.reload_start >= RELOAD_TIME:
+            self.ammo = MAGAZINE_SIZE
+            self.reload_start = None
+        
+        if keys[self.attack_key] and not self.attacking and self.reload_start is None:
+            if current_time - self.last_attack_time > self.attack_cooldown:
+                self.attacking = True
+                self.last_attack_time = current_time
+                self.attack()
+        
+        if self.attacking and current_time - self.last_attack_time > 200:
+            self.attacking = False
+        
+        # Pick the animation and its current frame
+        if self.health <= 0:
+            image_state = "Dead"
+        elif self.attacking:
+            image_state = "Shot" if self.shooter else "Attack"
+        elif self.invulnerable and current_time - self.last_hit_time < PLAYER_HURT_TIME:
+            image_state = "Hurt"
+        elif self.reload_start is not None:
+            image_state = "Recharge"
+        elif moving:
+            image_state = "Walk"
+        else:
+            image_state = "Idle"
+        if image_state != self.image_state:
+            self.image_state = image_state
+            self.anim_start = current_time
+        self.image = self.animations[image_state].frame(current_time - self.anim_start, self.facing_right)
+
+    def move(self, keys):
+        """One step of movement input; netplay clients also predict with this. True when moving"""
         moving = False
         
         if keys[self.left_key]:
@@ -180,62 +514,92 @@ class Player:
             moving = True
         
         self.rect.clamp_ip(pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
-        
-        if keys[self.attack_key] and not self.attacking:
-            if current_time - self.last_attack_time > self.attack_cooldown:
-                self.attacking = True
-                self.last_attack_time = current_time
-                self.attack()
-        
-        if self.attacking and current_time - self.last_attack_time > 200:
-            self.attacking = False
-        
-        # Update image facing direction
-        if not self.facing_right:
-            self.image = pygame.transform.flip(load_image(f"assets/player{self.player_num}/Idle.png"), True, False)
-        else:
-            self.image = load_image(f"assets/player{self.player_num}/Idle.png")
+        return moving
 
     def attack(self):
+        if self.shooter:
+            self.shoot()
+            return
         attack_rect = self.get_attack_rect()
         if not attack_rect:
             return
         
-        for zombie in zombies[:]:
-            if zombie.rect.colliderect(attack_rect) and zombie.state != "dead":
-                zombie.take_damage(self.damage)
-                if zombie.health <= 0:
-                    coins.append(Coin(screen, zombie.rect.centerx, zombie.rect.centery))
-                    zombies.remove(zombie)
+        game = self.game
+        for zombie in game.zombie_candidates(attack_rect):
+            # Only zombies whose visible pixels the swing reaches
+            if collider.overlap_rect(zombie.image, zombie.rect.topleft, attack_rect):
+                game.hit_zombie(zombie, self.damage)
     
-    def get_attack_rect(self):
-        if not self.attacking:
-            return None
-        
+    def shoot(self):
+        """Fire one shot from the muzzle side; emptying the magazine starts the reload"""
+        if self.ammo <= 0:
+            return
+        direction = 1 if self.facing_right else -1
+        x, y = self.muzzle()
+        self.game.projectiles.spawn(x, y, direction * SHOT_SPEED, 0, self.damage, SHOT_RANGE // SHOT_SPEED)
+        self.ammo -= 1
+        if self.ammo == 0:
+            self.reload_start = self.game.clock.get_ticks()
+    
+    def body_rect(self):
+        """Where the player's visible pixels are; the 50x50 rect only covers the top of the sprite"""
+        return collider.body(self.image, self.rect.topleft)
+    
+    def muzzle(self):
+        """Where shots leave: the facing edge of the body, at chest height"""
+        body = self.body_rect()
+        return (body.right if self.facing_right else body.left), body.top + body.height // 6
+    
+    def reach_rect(self):
+        """The area a swing would cover right now"""
+        body = self.body_rect()
         attack_rect = pygame.Rect(0, 0, 80, 60)
         offset_x = 40 if self.facing_right else -40
-        attack_rect.center = (self.rect.centerx + offset_x, self.rect.centery)
+        attack_rect.center = (body.centerx + offset_x, body.centery)
         return attack_rect
     
+    def get_attack_rect(self):
+        if not self.attacking:
+            return None
+        return self.reach_rect()
+    
     def take_damage(self, amount):
         if not self.invulnerable:
             self.health -= amount
             if self.health < 0:
                 self.health = 0
             self.invulnerable = True
-            self.last_hit_time = pygame.time.get_ticks()
+            self.last_hit_time = self.game.clock.get_ticks()
     
+    def draw_rect(self):
+        return interpolate_rect(self.rect, self.prev_pos, self.game.alpha)
+
     def draw(self):
         if not self.invulnerable or (self.invulnerable and self.flicker):
-            self.screen.blit(self.image, self.rect)
+            self.screen.blit(self.image, self.draw_rect())
+
+    def render_state(self):
+        visible = not self.invulnerable or self.flicker
+        return self.image.get_rect(topleft=self.draw_rect().topleft), (id(self.image), visible)
     
     def equip_weapon(self, weapon):
         self.equipped_weapon = weapon
         self.damage = weapon.damage
 
 class Zombie:
-    def __init__(self, screen, x, y, health, damage, speed, zombie_type, is_boss=False):
-        self.screen = screen
+    __slots__ = ("game", "screen", "zombie_type", "is_boss", "health", "max_health", "damage",
+                 "speed", "state", "facing_right", "scale", "image_state", "image", "rect",
+                 "target", "is_attacking", "attack_cooldown", "last_attack_time", "attack_range",
+                 "index", "prev_pos", "animations", "anim_start", "ai_tick", "uid")
+
+    def __init__(self, game, x, y, health, damage, speed, zombie_type, is_boss=False):
+        self.game = game
+        self.screen = game.screen
+        self.index = -1
+        self.reset(x, y, health, damage, speed, zombie_type, is_boss)
+
+    def reset(self, x, y, health, damage, speed, zombie_type, is_boss=False):
+        """(Re)initialise a zombie; pooled zombies are recycled through here"""
         self.zombie_type = zombie_type
         self.is_boss = is_boss
         self.health = health
@@ -244,17 +608,24 @@ class Zombie:
         self.speed = speed
         self.state = "idle"
         self.facing_right = True
-        self.image = load_image(f"assets/{zombie_type}/Idle.png", 1.5 if is_boss else 1.0)
+        self.scale = 1.5 if is_boss else 1.0
+        self.animations = sprite_cache.animations(zombie_type, ZOMBIE_ANIMATIONS, self.scale)
+        self.image_state = "Idle"
+        self.anim_start = self.game.clock.get_ticks()
+        self.image = self.animations["Idle"].frame(0)
         self.rect = self.image.get_rect(topleft=(x, y))
+        self.prev_pos = self.rect.topleft
         self.target = None
         self.is_attacking = False
         self.attack_cooldown = 1000
         self.last_attack_time = 0
         self.attack_range = 50 if not is_boss else 70
 
-    def update(self, player1, player2, dt):
+    def update(self, player1, player2, dt, steps=1):
+        """One AI tick; steps > 1 when the scheduler skipped ticks, so movement catches up"""
         if self.state == "dead":
             return True  # Ready to be removed
+        self.prev_pos = self.rect.topleft
             
         # Find closest player
         dist_to_player1 = math.hypot(self.rect.centerx - player1.rect.centerx, 
@@ -268,40 +639,50 @@ class Zombie:
         # Movement direction
         dx = self.target.rect.centerx - self.rect.centerx
         dy = self.target.rect.centery - self.rect.centery
-        self.facing_right = dx > 0
         
         # Normalize direction
         dist = max(1, math.hypot(dx, dy))
         dx, dy = dx / dist, dy / dist
         
-        current_time = pygame.time.get_ticks()
+        # Around walls, follow the target's flow field instead
+        flow_fields = self.game.flow_fields
+        if flow_fields is not None:
+            steer = flow_fields[0 if self.target is player1 else 1].steer(*self.rect.center)
+            if steer is not None:
+                dx, dy = steer
+        self.facing_right = dx > 0
+        
+        current_time = self.game.clock.get_ticks()
         
         # Combat logic
         if distance <= self.attack_range:
             if not self.is_attacking and current_time - self.last_attack_time > self.attack_cooldown:
                 self.is_attacking = True
                 self.last_attack_time = current_time
-                self.image = load_image(f"assets/{self.zombie_type}/Attack.png", 1.5 if self.is_boss else 1.0)
+                self.set_image_state("Attack", current_time)
                 
                 if distance < self.attack_range * 0.8 and self.target.is_vulnerable():
                     self.target.take_damage(self.damage)
         else:
             self.state = "walk"
-            self.rect.x += dx * self.speed
-            self.rect.y += dy * self.speed
-            self.image = load_image(f"assets/{self.zombie_type}/Walk.png", 1.5 if self.is_boss else 1.0)
+            self.rect.x += dx * self.speed * steps
+            self.rect.y += dy * self.speed * steps
+            self.set_image_state("Walk", current_time)
         
         # Reset attack state
         if self.is_attacking and current_time - self.last_attack_time > 500:
             self.is_attacking = False
-            self.image = load_image(f"assets/{self.zombie_type}/Idle.png", 1.5 if self.is_boss else 1.0)
-        
-        # Flip image if needed
-        if not self.facing_right:
-            self.image = pygame.transform.flip(self.image, True, False)
+            self.set_image_state("Idle", current_time)
         
+        self.image = self.animations[self.image_state].frame(current_time - self.anim_start, self.facing_right)
         return False
 
+    def set_image_state(self, image_state, now):
+        """Switch animation, restarting it only when the state actually changes"""
+        if image_state != self.image_state:
+            self.image_state = image_state
+            self.anim_start = now
+
     def take_damage(self, amount):
         if self.state == "dead":
             return False
@@ -310,202 +691,667 @@ class Zombie:
         if self.health <= 0:
             self.health = 0
             self.state = "dead"
-            self.image = load_image(f"assets/{self.zombie_type}/Dead.png", 1.5 if self.is_boss else 1.0)
-            return True  # Zombie died
+            image_state = "Dead"
         else:
-            self.image = load_image(f"assets/{self.zombie_type}/Hurt.png", 1.5 if self.is_boss else 1.0)
-            return False
+            image_state = "Hurt"
+        now = self.game.clock.get_ticks()
+        self.set_image_state(image_state, now)
+        self.image = self.animations[image_state].frame(now - self.anim_start, self.facing_right)
+        return self.state == "dead"  # True when the zombie died
+
+    def draw_rect(self):
+        return interpolate_rect(self.rect, self.prev_pos, self.game.alpha)
 
     def draw(self):
-        self.screen.blit(self.image, self.rect)
+        rect = self.draw_rect()
+        self.screen.blit(self.image, rect)
         
         # Health bar
         if self.state != "dead":
-            health_bar_width = 60 if self.is_boss else 40
-            health_ratio = self.health / self.max_health
-            
-            # Background
-            pygame.draw.rect(
-                self.screen, (60, 60, 60),
-                (self.rect.centerx - health_bar_width//2, self.rect.top - 10, 
-                 health_bar_width, 5)
-            )
-            
-            # Health level
-            health_color = (255, 215, 0) if self.is_boss else (0, 255, 0)
-            pygame.draw.rect(
-                self.screen, health_color,
-                (self.rect.centerx - health_bar_width//2, self.rect.top - 10,
-                 int(health_bar_width * health_ratio), 5)
-            )
-            
-            # Border
-            pygame.draw.rect(
-                self.screen, (255, 255, 255),
-                (self.rect.centerx - health_bar_width//2, self.rect.top - 10,
-                 health_bar_width, 5), 1
-            )
+            bar = health_bar_cache.get("boss" if self.is_boss else "zombie", self.health, self.max_health)
+            self.screen.blit(bar, (rect.centerx - bar.get_width()//2, rect.top - 10))
+
+    def render_state(self):
+        rect = self.draw_rect()
+        style = "boss" if self.is_boss else "zombie"
+        health_bar_width = HEALTH_BAR_STYLES[style][0]
+        # Walk and attack frames are wider than the idle frame the rect was sized from
+        bounds = self.image.get_rect(topleft=rect.topleft)
+        bounds.union_ip((rect.centerx - health_bar_width//2, rect.top - 10, health_bar_width, 5))
+        # Damage that stays within one fill level does not need a redraw; the index is the paint order
+        return bounds, (id(self.image), health_bar_cache.level(style, self.health, self.max_health),
+                        self.state, self.index)
+
+class SwarmZombie:
+    """Thin view of one zombie stored in the NumPy swarm, used for hits and drawing"""
+    __slots__ = ("game", "swarm", "screen", "zombie_type", "is_boss", "scale", "slot", "animations", "uid")
+
+    def __init__(self, game, x, y, health, damage, speed, zombie_type, is_boss=False):
+        self.game = game
+        self.swarm = game.swarm
+        self.screen = game.screen
+        self.reset(x, y, health, damage, speed, zombie_type, is_boss)
+
+    def reset(self, x, y, health, damage, speed, zombie_type, is_boss=False):
+        self.zombie_type = zombie_type
+        self.is_boss = is_boss
+        self.scale = 1.5 if is_boss else 1.0
+        self.animations = sprite_cache.animations(zombie_type, ZOMBIE_ANIMATIONS, self.scale)
+        width, height = self.animations["Idle"].frame(0).get_size()
+        self.slot = self.swarm.add(x, y, width, height, health, damage, speed,
+                                   50 if not is_boss else 70, self.game.clock.get_ticks())
+
+    @property
+    def index(self):
+        # Kept in the swarm so landed hits are applied in list order, like the per-object loop
+        return int(self.swarm.order[self.slot])
+
+    @index.setter
+    def index(self, value):
+        self.swarm.order[self.slot] = value
+
+    @property
+    def rect(self):
+        s, i = self.swarm, self.slot
+        return pygame.Rect(int(s.x[i]), int(s.y[i]), int(s.w[i]), int(s.h[i]))
+
+    @property
+    def prev_pos(self):
+        return int(self.swarm.prev_x[self.slot]), int(self.swarm.prev_y[self.slot])
+
+    @property
+    def health(self):
+        return int(self.swarm.health[self.slot])
+
+    @property
+    def max_health(self):
+        return int(self.swarm.max_health[self.slot])
+
+    @property
+    def damage(self):
+        return int(self.swarm.damage[self.slot])
+
+    @property
+    def state(self):
+        return STATE_NAMES[self.swarm.state[self.slot]]
+
+    @property
+    def facing_right(self):
+        return bool(self.swarm.facing_right[self.slot])
+
+    @property
+    def image_state(self):
+        return IMAGE_STATES[self.swarm.image_state[self.slot]]
+
+    @property
+    def image(self):
+        s, i = self.swarm, self.slot
+        animation = self.animations[IMAGE_STATES[s.image_state[i]]]
+        return animation.frame(self.game.clock.get_ticks() - float(s.anim_start[i]), self.facing_right)
+
+    def take_damage(self, amount):
+        s, i = self.swarm, self.slot
+        if s.state[i] == STATE_DEAD:
+            return False
+        
+        s.health[i] -= amount
+        if s.health[i] <= 0:
+            s.health[i] = 0
+            s.state[i] = STATE_DEAD
+            s.set_image_state(i, IMAGE_DEAD, self.game.clock.get_ticks())
+            return True  # Zombie died
+        else:
+            s.set_image_state(i, IMAGE_HURT, self.game.clock.get_ticks())
+            return False
+
+    draw_rect = Zombie.draw_rect
+    draw = Zombie.draw
+    render_state = Zombie.render_state
 
 class UI:
     def __init__(self, screen):
         self.screen = screen
+        self.transition_overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        self.transition_overlay.fill((0, 0, 0, 180))
     
     def draw_health_bar(self, health, max_health, x, y, label=None):
-        bar_width = 200
-        bar_height = 20
-        
         if label:
-            label_text = font_small.render(label, True, WHITE)
-            self.screen.blit(label_text, (x, y - 20))
-        
-        pygame.draw.rect(self.screen, RED, (x, y, bar_width, bar_height))
-        health_width = max(0, (health / max_health) * bar_width)
-        pygame.draw.rect(self.screen, GREEN, (x, y, health_width, bar_height))
-        pygame.draw.rect(self.screen, WHITE, (x, y, bar_width, bar_height), 2)
-        
-        health_text = font_small.render(f"HP: {health}/{max_health}", True, WHITE)
-        self.screen.blit(health_text, (x + 5, y + 2))
+            self.screen.blit(text_cache.render(font_small, label, WHITE), (x, y - 20))
+        self.screen.blit(health_bar_cache.get("player", health, max_health), (x, y))
+        self.screen.blit(text_cache.render(font_small, f"HP: {health}/{max_health}", WHITE), (x + 5, y + 2))
+    
+    def health_bar_rect(self, x, y):
+        return pygame.Rect(x, y - 20, 200, 40)
+    
+    def coins_rect(self, coins, x, y):
+        return pygame.Rect((x, y), font_medium.size(f"Coins: {coins}"))
+    
+    def stage_rect(self, stage, x, y):
+        return pygame.Rect((x, y), font_large.size(f"Stage {stage}"))
     
     def draw_coins(self, coins, x, y):
-        coin_text = font_medium.render(f"Coins: {coins}", True, YELLOW)
+        coin_text = text_cache.render(font_medium, f"Coins: {coins}", YELLOW)
         self.screen.blit(coin_text, (x, y))
     
     def draw_stage(self, stage, x, y):
-        stage_text = font_large.render(f"Stage {stage}", True, WHITE)
+        stage_text = text_cache.render(font_large, f"Stage {stage}", WHITE)
         self.screen.blit(stage_text, (x, y))
     
-    def draw_stage_transition(self, stage):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))
-        self.screen.blit(overlay, (0, 0))
+    def draw_stage_transition(self, stage, background=None):
+        # The next map fades in under the overlay once it has streamed in
+        if background is not None:
+            self.screen.blit(background, (0, 0))
+        self.screen.blit(self.transition_overlay, (0, 0))
         
         if stage in STAGE_BOSSES:
-            text = font_large.render(f"BOSS STAGE!", True, (255, 50, 50))
+            text = text_cache.render(font_large, "BOSS STAGE!", (255, 50, 50))
         else:
-            text = font_large.render(f"Stage {stage}", True, WHITE)
+            text = text_cache.render(font_large, f"Stage {stage}", WHITE)
         
         text_rect = text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
         self.screen.blit(text, text_rect)
 
-# Initialize game objects
-ui = UI(screen)
-player1 = None
-player2 = None
-zombies = []
-coins = []
-current_stage = 1
-max_stages = 5
-player1_coins = 0
-player2_coins = 0
-spawn_timer = 0
-spawn_interval = 2000
+def preload_steps():
+    """preload_sprites() one sprite set per step, so the menu can keep drawing in between"""
+    for player_num in (1, 2):
+        sprite_cache.animations(f"player{player_num}", PLAYER_ANIMATIONS[player_num])
+        yield
+    for zombie_type in zombie_types:
+        sprite_cache.animations(zombie_type, ZOMBIE_ANIMATIONS)
+        yield
+    for boss_type in STAGE_BOSSES.values():
+        sprite_cache.animations(boss_type, ZOMBIE_ANIMATIONS, 1.5)
+        yield
+    for coin_type in (1, 2, 3):
+        sprite_cache.get("coins", f"Coin{coin_type}", (30, 30))
+        yield
+    health_bar_cache.prerender()
+    yield
+    for animations in list(sprite_cache.animation_sets.values()):
+        for animation in animations.values():
+            collider.prebuild(animation.frames + animation.flipped)
+        yield
+    if isinstance(screen, RenderTarget):
+        # Sprites are scaled to the render resolution here rather than on their first blit
+        for animations in list(sprite_cache.animation_sets.values()):
+            for animation in animations.values():
+                screen.prescale(animation.frames + animation.flipped)
+            yield
+        screen.prescale(sprite_cache.surfaces.values())
+        screen.prescale(health_bar_cache.surfaces.values())
+        yield
+
+def preload_sprites():
+    """Fill the sprite cache and frame tables up front so state changes never touch the disk"""
+    for _ in preload_steps():
+        pass
+
+def load_steps():
+    """Everything gameplay needs loaded, as small steps the menu runs between frames"""
+    load_sprite_atlas()
+    yield
+    yield from preload_steps()
+
+def advance_loading(loading, budget_ms=LOAD_SLICE_MS):
+    """Run loading steps for about budget_ms (all of them if None); returns None once finished"""
+    deadline = time.perf_counter() + budget_ms / 1000 if budget_ms is not None else None
+    for _ in loading:
+        if deadline is not None and time.perf_counter() >= deadline:
+            return loading
+    startup.mark("assets")
+    # Startup objects live forever; keep them out of the collector's generations
+    gc.freeze()
+    return None
+
 zombie_types = ["zombie1", "zombie2", "zombie3"]
-zombies_spawned = 0
-stage_transition_timer = 0
+max_stages = 5
 stage_transition_duration = 2000  # 2 seconds
 
-def init_game():
-    global player1, player2, zombies, coins, current_stage, player1_coins, player2_coins, zombies_spawned
-    player1 = Player(screen, SCREEN_WIDTH // 4, SCREEN_HEIGHT // 2, 100, 10, 5, 1)
-    player2 = Player(screen, 3 * SCREEN_WIDTH // 4, SCREEN_HEIGHT // 2, 100, 10, 5, 2)
-    zombies.clear()
-    coins.clear()
-    current_stage = 1
-    player1_coins = 0
-    player2_coins = 0
-    zombies_spawned = 0
-
-def spawn_zombie():
-    global zombies_spawned
-    
-    if zombies_spawned >= STAGE_ZOMBIE_COUNTS[current_stage]:
-        return
-    
-    # Spawn boss if it's time
-    if zombies_spawned == STAGE_ZOMBIE_COUNTS[current_stage] - 1 and current_stage in STAGE_BOSSES:
-        spawn_boss()
-        zombies_spawned += 1
-        return
-    
-    zombie_type = random.choice(zombie_types)
-    side = random.randint(0, 3)
-    
-    if side == 0:  # Top
-        x = random.randint(0, SCREEN_WIDTH)
-        y = -50
-    elif side == 1:  # Right
-        x = SCREEN_WIDTH + 50
-        y = random.randint(0, SCREEN_HEIGHT)
-    elif side == 2:  # Bottom
-        x = random.randint(0, SCREEN_WIDTH)
-        y = SCREEN_HEIGHT + 50
-    else:  # Left
-        x = -50
-        y = random.randint(0, SCREEN_HEIGHT)
-    
-    health = 80 + current_stage * 20
-    speed = 1 + current_stage * 0.2
-    
-    zombies.append(Zombie(screen, x, y, health, 5 + current_stage * 2, speed, zombie_type))
-    zombies_spawned += 1
+class SimClock:
+    """Game clock that only moves when the simulation advances it"""
+    def __init__(self, ticks=0):
+        self.ticks = ticks
 
-def spawn_boss():
-    boss_type = STAGE_BOSSES[current_stage]
-    side = random.randint(0, 3)
-    
-    if side == 0:  # Top
-        x = random.randint(100, SCREEN_WIDTH - 100)
-        y = -100
-    elif side == 1:  # Right
-        x = SCREEN_WIDTH + 100
-        y = random.randint(100, SCREEN_HEIGHT - 100)
-    elif side == 2:  # Bottom
-        x = random.randint(100, SCREEN_WIDTH - 100)
-        y = SCREEN_HEIGHT + 100
-    else:  # Left
-        x = -100
-        y = random.randint(100, SCREEN_HEIGHT - 100)
-    
-    health = 300 + current_stage * 50
-    damage = 20 + current_stage * 5
-    speed = 1.5 + current_stage * 0.1
-    
-    zombies.append(Zombie(screen, x, y, health, damage, speed, boss_type, is_boss=True))
+    def advance(self, dt):
+        self.ticks += dt
 
-def check_stage_completion():
-    global current_stage, zombies_spawned, stage_transition_timer
-    
-    if (len(zombies) == 0 and 
-        zombies_spawned >= STAGE_ZOMBIE_COUNTS[current_stage] and 
-        current_stage < max_stages):
+    def get_ticks(self):
+        return self.ticks
+
+class KeyState:
+    """Stands in for pygame.key.get_pressed() when inputs are scripted"""
+    def __init__(self, held=()):
+        self.held = frozenset(held)
+
+    def __getitem__(self, key):
+        return key in self.held
+
+NO_KEYS = KeyState()
+
+class Game:
+    """All gameplay state, advanced one frame at a time by step()"""
+    def __init__(self, screen, seed=None, clock=None, use_swarm=USE_SWARM, streamer=None,
+                 use_lod=USE_LOD, balance=None, ai_budget=AI_BUDGET):
+        self.screen = screen
+        self.balance = dict(BALANCE, **(balance or {}))
+        self.streamer = streamer
+        self.ui = UI(screen)
+        self.rng = random.Random(seed)
+        self.clock = clock if clock is not None else SimClock()
+        # Render interpolation between the last two steps, set by the main loop
+        self.alpha = 1.0
+        self.state = MENU
+        self.player1 = None
+        self.player2 = None
+        self.zombies = []
+        self.zombie_grid = SpatialGrid(GRID_CELL_SIZE)
+        # How far any zombie frame reaches right and down past the idle-sized rect it is bucketed by
+        self.zombie_reach = (0, 0)
+        self.reach_checked = set()
+        self.coin_manager = CoinManager(lambda x, y, coin_type: Coin(screen, x, y, coin_type),
+                                        GRID_CELL_SIZE, COIN_LIFETIME, COIN_MERGE_RADIUS)
+        self.coins = self.coin_manager.coins
+        self.coin_grid = self.coin_manager.grid
+        self.walls = []
+        self.flow_fields = None  # One per player, only while there are walls
+        self.swarm = ZombieSwarm(cell_size=GRID_CELL_SIZE) if use_swarm else None
+        self.swarm_zombies = {}  # swarm slot -> SwarmZombie
+        # The swarm updates every zombie in a few array operations, so it skips tiering
+        self.ai_scheduler = AIScheduler(AI_VIEW, budget=ai_budget) if use_lod and not use_swarm else None
+        self.ticks = 0  # Completed update ticks
+        self.next_uid = 1  # Zombies and coins get a never-reused id, used by netplay snapshots
+        self.zombie_pool = []
+        self.projectiles = ProjectilePool(PROJECTILE_CAPACITY)
+        self.current_stage = 1
+        self.player1_coins = 0
+        self.player2_coins = 0
+        self.spawn_timer = 0
+        self.spawn_interval = self.balance["spawn_interval"]
+        self.zombies_spawned = 0
+        self.stage_transition_timer = 0
+
+    def start(self):
+        self.player1 = Player(self, SCREEN_WIDTH // 4, SCREEN_HEIGHT // 2, 100, 10, 5, 1)
+        self.player2 = Player(self, 3 * SCREEN_WIDTH // 4, SCREEN_HEIGHT // 2, 100, 10, 5, 2)
+        self.zombie_pool.extend(self.zombies)
+        self.zombies.clear()
+        self.zombie_grid.clear()
+        self.coin_manager.clear()
+        self.projectiles.clear()
+        if self.swarm is not None:
+            self.swarm.clear()
+            self.swarm_zombies.clear()
+        self.current_stage = 1
+        self.player1_coins = 0
+        self.player2_coins = 0
+        self.zombies_spawned = 0
+        self.state = PLAYING
+        self.prefetch_maps()
+
+    def prefetch_maps(self):
+        """Queue the current and next stage maps on the streamer and drop the rest"""
+        if self.streamer is None:
+            return
+        size = (SCREEN_WIDTH, SCREEN_HEIGHT)
+        current = STAGE_MAPS[self.current_stage]
+        upcoming = STAGE_MAPS.get(self.current_stage + 1, current)
+        for path in set(STAGE_MAPS.values()) - {current, upcoming}:
+            self.streamer.release(path, size)
+        self.streamer.request(current, size)
+        self.streamer.request(upcoming, size, prefetch=True)
+
+    def background(self):
+        """Current stage map, or None until the streamer has it ready"""
+        if self.streamer is None:
+            return None
+        path, size = STAGE_MAPS[self.current_stage], (SCREEN_WIDTH, SCREEN_HEIGHT)
+        background = self.streamer.get(path, size)
+        if background is None:
+            # Evicted under memory pressure; ask for it again
+            self.streamer.request(path, size)
+        return background
+
+    def add_zombie(self, x, y, health, damage, speed, zombie_type, is_boss=False):
+        if self.zombie_pool:
+            zombie = self.zombie_pool.pop()
+            zombie.reset(x, y, health, damage, speed, zombie_type, is_boss)
+        elif self.swarm is not None:
+            zombie = SwarmZombie(self, x, y, health, damage, speed, zombie_type, is_boss)
+        else:
+            zombie = Zombie(self, x, y, health, damage, speed, zombie_type, is_boss)
+        if self.swarm is not None:
+            self.swarm_zombies[zombie.slot] = zombie
+        else:
+            zombie.ai_tick = self.ticks - 1  # Due on the current tick
+        zombie.uid = self.next_uid
+        self.next_uid += 1
+        zombie.index = len(self.zombies)
+        self.zombies.append(zombie)
+        self.zombie_grid.insert(zombie)
+        if id(zombie.animations) not in self.reach_checked:
+            self.reach_checked.add(id(zombie.animations))
+            reach_x, reach_y = self.zombie_reach
+            width, height = zombie.rect.size
+            for animation in zombie.animations.values():
+                for frame in animation.frames:
+                    reach_x = max(reach_x, frame.get_width() - width)
+                    reach_y = max(reach_y, frame.get_height() - height)
+            self.zombie_reach = (reach_x, reach_y)
+        return zombie
+
+    def zombie_candidates(self, rect):
+        """Zombies whose current frame might overlap rect; the caller does the exact test"""
+        reach_x, reach_y = self.zombie_reach
+        search = pygame.Rect(rect.x - reach_x, rect.y - reach_y, rect.w + reach_x, rect.h + reach_y)
+        return self.zombie_grid.candidates(search)
+
+    def remove_zombie(self, zombie):
+        swap_remove(self.zombies, zombie)
+        self.zombie_grid.remove(zombie)
+        if self.swarm is not None:
+            self.swarm.remove(zombie.slot)
+            del self.swarm_zombies[zombie.slot]
+        self.zombie_pool.append(zombie)
+
+    def hit_zombie(self, zombie, damage):
+        """Damage a zombie from an attack; a kill drops a coin and removes it"""
+        if zombie.state == "dead":
+            return
+        zombie.take_damage(damage)
+        if zombie.health <= 0:
+            self.add_coin(zombie.rect.centerx, zombie.rect.centery)
+            self.remove_zombie(zombie)
+
+    def add_coin(self, x, y, coin_type=1, merge=True):
+        """Drop a coin, or add it to a nearby stack of the same type; returns the coin it ended up in"""
+        coin = self.coin_manager.drop(x, y, self.clock.get_ticks(), coin_type, merge)
+        if coin.stack == 1:
+            coin.uid = self.next_uid
+            self.next_uid += 1
+        return coin
+
+    def remove_coin(self, coin):
+        self.coin_manager.remove(coin)
+
+    def set_walls(self, walls):
+        """Obstacles zombies path around; an empty list goes back to chasing in straight lines"""
+        self.walls = [pygame.Rect(wall) for wall in walls]
+        if not self.walls:
+            self.flow_fields = None
+        elif self.flow_fields is None:
+            self.flow_fields = (FlowField(FLOW_BOUNDS, FLOW_CELL_SIZE, self.walls),
+                                FlowField(FLOW_BOUNDS, FLOW_CELL_SIZE, self.walls))
+        else:
+            for field in self.flow_fields:
+                field.set_walls(self.walls)
+
+    def update_swarm(self):
+        """Swarm counterpart of the per-zombie update loop"""
+        hits, dead, moved = self.swarm.update(self.player1.rect.center, self.player2.rect.center,
+                                              self.clock.get_ticks(), self.flow_fields)
+        targets = (self.player1, self.player2)
+        for slot, target in hits:
+            if targets[target].is_vulnerable():
+                targets[target].take_damage(self.swarm_zombies[slot].damage)
+        for slot in dead:
+            self.remove_zombie(self.swarm_zombies[slot])
+        for slot in moved:
+            self.zombie_grid.move(self.swarm_zombies[slot])
+
+    def stage_zombie_count(self, stage):
+        return max(1, round(STAGE_ZOMBIE_COUNTS[stage] * self.balance["zombie_count_scale"]))
+
+    def stage_value(self, name, stage):
+        balance = self.balance
+        return balance[name] + stage * balance[name + "_per_stage"]
+
+    def spawn_zombie(self):
+        stage = self.current_stage
+        count = self.stage_zombie_count(stage)
+        if self.zombies_spawned >= count:
+            return
+        
+        # Spawn boss if it's time
+        if self.zombies_spawned == count - 1 and stage in STAGE_BOSSES and self.balance["bosses"]:
+            self.spawn_boss()
+            self.zombies_spawned += 1
+            return
+        
+        rng = self.rng
+        zombie_type = rng.choice(zombie_types)
+        side = rng.randint(0, 3)
+        
+        if side == 0:  # Top
+            x = rng.randint(0, SCREEN_WIDTH)
+            y = -50
+        elif side == 1:  # Right
+            x = SCREEN_WIDTH + 50
+            y = rng.randint(0, SCREEN_HEIGHT)
+        elif side == 2:  # Bottom
+            x = rng.randint(0, SCREEN_WIDTH)
+            y = SCREEN_HEIGHT + 50
+        else:  # Left
+            x = -50
+            y = rng.randint(0, SCREEN_HEIGHT)
+        
+        health = int(self.stage_value("zombie_health", stage))
+        damage = int(self.stage_value("zombie_damage", stage))
+        speed = self.stage_value("zombie_speed", stage)
+        
+        self.add_zombie(x, y, health, damage, speed, zombie_type)
+        self.zombies_spawned += 1
+
+    def spawn_boss(self):
+        stage = self.current_stage
+        boss_type = STAGE_BOSSES[stage]
+        rng = self.rng
+        side = rng.randint(0, 3)
+        
+        if side == 0:  # Top
+            x = rng.randint(100, SCREEN_WIDTH - 100)
+            y = -100
+        elif side == 1:  # Right
+            x = SCREEN_WIDTH + 100
+            y = rng.randint(100, SCREEN_HEIGHT - 100)
+        elif side == 2:  # Bottom
+            x = rng.randint(100, SCREEN_WIDTH - 100)
+            y = SCREEN_HEIGHT + 100
+        else:  # Left
+            x = -100
+            y = rng.randint(100, SCREEN_HEIGHT - 100)
+        
+        health = int(self.stage_value("boss_health", stage))
+        damage = int(self.stage_value("boss_damage", stage))
+        speed = self.stage_value("boss_speed", stage)
+        
+        self.add_zombie(x, y, health, damage, speed, boss_type, is_boss=True)
+
+    def check_stage_completion(self):
+        if (len(self.zombies) == 0 and 
+            self.zombies_spawned >= self.stage_zombie_count(self.current_stage) and 
+            self.current_stage < max_stages):
+            
+            self.current_stage += 1
+            self.zombies_spawned = 0
+            self.stage_transition_timer = self.clock.get_ticks()
+            self.prefetch_maps()
+            return True
+        return False
+
+    def update_entities(self, inputs, dt):
+        """Update phase: players, spawning and zombie movement/attacks"""
+        player1, player2 = self.player1, self.player2
+        
+        # Update game objects
+        player1.update(inputs)
+        player2.update(inputs)
+        profiler.mark("players")
+        
+        # Shots in flight; only zombies in the cells a shot sweeps are tested, down to their pixels
+        self.projectiles.update(self.zombie_grid, self.hit_zombie, collider, self.zombie_reach)
+        profiler.count("shots", len(self.projectiles))
+        profiler.count("shot_tests", self.projectiles.stats["tested"])
+        profiler.mark("projectiles")
+        
+        # Check for game over
+        if player1.health <= 0 and player2.health <= 0:
+            self.state = GAME_OVER
+        
+        # Spawn zombies
+        self.spawn_timer += dt
+        if (self.spawn_timer >= self.spawn_interval and
+                self.zombies_spawned < self.stage_zombie_count(self.current_stage)):
+            self.spawn_timer = 0
+            self.spawn_zombie()
+        profiler.mark("spawn")
         
-        current_stage += 1
-        zombies_spawned = 0
-        stage_transition_timer = pygame.time.get_ticks()
-        return True
-    return False
+        # Update zombies; the flow fields only rebuild when a player changes cell
+        if self.flow_fields is not None:
+            self.flow_fields[0].update(*player1.rect.center)
+            self.flow_fields[1].update(*player2.rect.center)
+        if self.swarm is not None:
+            self.update_swarm()
+        else:
+            tick = self.ticks
+            if self.ai_scheduler is not None:
+                zombies = self.ai_scheduler.due(self.zombies, tick, player1, player2)
+                profiler.count("ai_deferred", self.ai_scheduler.stats["deferred"])
+            else:
+                zombies = list(self.zombies)
+            for zombie in zombies:
+                steps = min(tick - zombie.ai_tick, MAX_CATCHUP_STEPS)
+                zombie.ai_tick = tick
+                if zombie.update(player1, player2, dt, steps):
+                    self.remove_zombie(zombie)
+                else:
+                    self.zombie_grid.move(zombie)
+        self.ticks += 1
+        profiler.mark("zombies")
+
+    def resolve_collisions(self, dt):
+        """Collision phase: contact damage, coin pickup/expiry and stage completion"""
+        player1, player2 = self.player1, self.player2
+        
+        # Contact damage: zombies in the players' cells, then only where the sprites' pixels touch
+        for player in (player1, player2):
+            if not player.is_vulnerable():
+                continue
+            image, topleft = player.image, player.rect.topleft
+            for zombie in self.zombie_candidates(image.get_rect(topleft=topleft)):
+                if collider.overlap(image, topleft, zombie.image, zombie.rect.topleft):
+                    player.take_damage(zombie.damage)
+                    break
+        hit_tests = collider.take_stats()
+        profiler.count("rect_tests", hit_tests["rect_tests"])
+        profiler.count("mask_tests", hit_tests["mask_tests"])
+        profiler.mark("contacts")
+        
+        # Coins: one grid query per player, then only the coins due off the expiry heap
+        coins = self.coin_manager
+        self.player1_coins += coins.collect(player1.rect)
+        self.player2_coins += coins.collect(player2.rect)
+        coins.expire(self.clock.get_ticks())
+        profiler.count("coins", len(coins))
+        profiler.mark("coins")
+        
+        # Check stage completion
+        if self.check_stage_completion():
+            self.state = STAGE_TRANSITION
+
+    def step(self, inputs, dt):
+        """Advance the simulation by one frame of dt milliseconds.
+
+        inputs is anything indexable by key constant, like pygame.key.get_pressed()
+        or a KeyState. Nothing here reads the display, the event queue or the wall clock.
+        """
+        self.clock.advance(dt)
+        
+        if self.state == PLAYING:
+            self.update_entities(inputs, dt)
+            self.resolve_collisions(dt)
+        
+        elif self.state == STAGE_TRANSITION:
+            if self.clock.get_ticks() - self.stage_transition_timer > stage_transition_duration:
+                self.state = PLAYING
+                balance = self.balance
+                self.spawn_interval = max(balance["spawn_interval_min"], balance["spawn_interval"] -
+                                          (self.current_stage - 1) * balance["spawn_interval_step"])
+
+    def drawables(self):
+        """Paint-ordered (key, bounds, signature, draw) items for the current frame"""
+        screen_rect = self.screen.get_rect()
+        background = self.background()
+        if self.state == STAGE_TRANSITION:
+            stage = self.current_stage
+            return [("transition", screen_rect, (stage, id(background)),
+                     lambda: self.ui.draw_stage_transition(stage, background))]
+        if self.state != PLAYING:
+            return []
+        
+        items = []
+        if background is not None:
+            items.append(("background", screen_rect, id(background),
+                          lambda: self.screen.blit(background, (0, 0))))
+        for entity in self.coins + self.zombies + [self.player1, self.player2]:
+            bounds, signature = entity.render_state()
+            # Zombies still walking in from off screen are not drawn
+            if bounds.colliderect(screen_rect):
+                items.append((id(entity), bounds, signature, entity.draw))
+        projectiles = self.projectiles
+        for slot in projectiles.active:
+            rect = projectiles.draw_rect(slot, self.alpha)
+            if rect.colliderect(screen_rect):
+                items.append((("shot", slot), rect, None,
+                              lambda rect=rect: self.screen.blit(projectiles.image, rect)))
+        
+        ui = self.ui
+        player1, player2 = self.player1, self.player2
+        p1_coins, p2_coins, stage = self.player1_coins, self.player2_coins, self.current_stage
+        items += [
+            ("p1_health", ui.health_bar_rect(SCREEN_WIDTH - 210, SCREEN_HEIGHT - 30), (player1.health, player1.max_health),
+             lambda: ui.draw_health_bar(player1.health, player1.max_health, SCREEN_WIDTH - 210, SCREEN_HEIGHT - 30, "Player 1")),
+            ("p2_health", ui.health_bar_rect(10, SCREEN_HEIGHT - 30), (player2.health, player2.max_health),
+             lambda: ui.draw_health_bar(player2.health, player2.max_health, 10, SCREEN_HEIGHT - 30, "Player 2")),
+            ("p1_coins", ui.coins_rect(p1_coins, SCREEN_WIDTH - 100, SCREEN_HEIGHT - 60), p1_coins,
+             lambda: ui.draw_coins(p1_coins, SCREEN_WIDTH - 100, SCREEN_HEIGHT - 60)),
+            ("p2_coins", ui.coins_rect(p2_coins, 10, SCREEN_HEIGHT - 60), p2_coins,
+             lambda: ui.draw_coins(p2_coins, 10, SCREEN_HEIGHT - 60)),
+            ("stage", ui.stage_rect(stage, SCREEN_WIDTH // 2 - 50, 10), stage,
+             lambda: ui.draw_stage(stage, SCREEN_WIDTH // 2 - 50, 10)),
+        ]
+        return items
+
+    def draw(self):
+        if self.state in (PLAYING, STAGE_TRANSITION):
+            self.screen.fill(BLACK)
+            for item in self.drawables():
+                item[3]()
 
 def draw_menu():
-    screen.fill(BLACK)
+    title_screen = asset_streamer.get(TITLE_SCREEN, (SCREEN_WIDTH, SCREEN_HEIGHT))
+    if title_screen is not None:
+        screen.blit(title_screen, (0, 0))
+    else:
+        screen.fill(BLACK)
     
-    title_shadow = title_font.render("Attack On Heec", True, (50, 50, 50))
-    title_text = title_font.render("Attack On Heec", True, (220, 20, 20))
+    title_shadow = text_cache.render(title_font, "Attack On Heec", (50, 50, 50))
+    title_text = text_cache.render(title_font, "Attack On Heec", (220, 20, 20))
     title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 3))
     screen.blit(title_shadow, (title_rect.x + 3, title_rect.y + 3))
     screen.blit(title_text, title_rect)
     
-    button_text = button_font.render("PLAY", True, WHITE)
+    button_text = text_cache.render(button_font, "PLAY", WHITE)
     button_rect = button_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
     
-    pygame.draw.rect(screen, (100, 10, 10), 
-                    (button_rect.x - 25, button_rect.y - 15, 
-                     button_rect.width + 50, button_rect.height + 30))
-    pygame.draw.rect(screen, (150, 20, 20), 
-                    (button_rect.x - 20, button_rect.y - 10, 
-                     button_rect.width + 40, button_rect.height + 20))
-    pygame.draw.rect(screen, (50, 0, 0), 
-                    (button_rect.x - 25, button_rect.y - 15, 
-                     button_rect.width + 50, button_rect.height + 30), 2)
+    draw_rect(screen, (100, 10, 10), 
+              (button_rect.x - 25, button_rect.y - 15, 
+               button_rect.width + 50, button_rect.height + 30))
+    draw_rect(screen, (150, 20, 20), 
+              (button_rect.x - 20, button_rect.y - 10, 
+               button_rect.width + 40, button_rect.height + 20))
+    draw_rect(screen, (50, 0, 0), 
+              (button_rect.x - 25, button_rect.y - 15, 
+               button_rect.width + 50, button_rect.height + 30), 2)
     
     screen.blit(button_text, button_rect)
     
@@ -513,119 +1359,176 @@ def draw_menu():
 
 def draw_game_over():
     screen.fill(BLACK)
-    gameover_text = title_font.render("GAME OVER", True, RED)
+    gameover_text = text_cache.render(title_font, "GAME OVER", RED)
     gameover_rect = gameover_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 3))
     screen.blit(gameover_text, gameover_rect)
     
-    button_text = button_font.render("PLAY AGAIN", True, WHITE)
+    button_text = text_cache.render(button_font, "PLAY AGAIN", WHITE)
     button_rect = button_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
-    pygame.draw.rect(screen, (50, 50, 50), 
-                    (button_rect.x - 20, button_rect.y - 10, 
-                     button_rect.width + 40, button_rect.height + 20))
+    draw_rect(screen, (50, 50, 50), 
+              (button_rect.x - 20, button_rect.y - 10, 
+               button_rect.width + 40, button_rect.height + 20))
     screen.blit(button_text, button_rect)
     
     return button_rect
 
-# Main game loop
-running = True
-while running:
-    dt = clock.tick(FPS)
+def main():
+    init()
+    asset_streamer.request(TITLE_SCREEN, (SCREEN_WIDTH, SCREEN_HEIGHT))
+    # Sprites load a slice at a time under the menu; pressing PLAY finishes the rest at once
+    loading = load_steps()
+    report_startup = "--startup-report" in sys.argv
+    quit_when_loaded = "--quit-when-loaded" in sys.argv  # For timing startup from bench.py
+    seed = cli_option("--seed")
+    seed = int(seed) if seed is not None else random.randrange(2 ** 32)
+    game = Game(screen, seed=seed, streamer=asset_streamer)
+    record_path = cli_option("--record")
+    recorder = None
+    if record_path is not None:
+        flags = (FLAG_SWARM if game.swarm is not None else 0) | (FLAG_LOD if game.ai_scheduler else 0)
+        recorder = Recorder(seed, SIM_DT, RECORDED_KEYS, flags, ai_budget=AI_BUDGET, balance=game.balance)
+    renderer = DirtyRenderer(screen, BLACK) if USE_DIRTY_RECTS else None
+    screen_rect = screen.get_rect()
     
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
+    # Main game loop: fixed simulation steps, rendering as often as RENDER_FPS allows
+    accumulator = 0.0
+    running = True
+    while running:
+        accumulator += clock.tick(RENDER_FPS)
+        profiler.begin_frame()
         
-        if event.type == pygame.MOUSEBUTTONDOWN:
-            mouse_pos = pygame.mouse.get_pos()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
             
-            if current_state == MENU:
-                button_rect = draw_menu()
-                if button_rect.collidepoint(mouse_pos):
-                    current_state = PLAYING
-                    init_game()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle_overlay()
             
-            elif current_state == GAME_OVER:
-                button_rect = draw_game_over()
-                if button_rect.collidepoint(mouse_pos):
-                    current_state = PLAYING
-                    init_game()
-    
-    if current_state == MENU:
-        draw_menu()
-    
-    elif current_state == PLAYING:
-        # Update game objects
-        player1.update()
-        player2.update()
-        
-        # Check for game over
-        if player1.health <= 0 and player2.health <= 0:
-            current_state = GAME_OVER
-        
-        # Spawn zombies
-        spawn_timer += dt
-        if spawn_timer >= spawn_interval and zombies_spawned < STAGE_ZOMBIE_COUNTS[current_stage]:
-            spawn_timer = 0
-            spawn_zombie()
-        
-        # Update zombies
-        for zombie in list(zombies):
-            if zombie.update(player1, player2, dt):
-                zombies.remove(zombie)
-            
-            if zombie.rect.colliderect(player1.rect) and player1.is_vulnerable():
-                player1.take_damage(zombie.damage)
-            
-            if zombie.rect.colliderect(player2.rect) and player2.is_vulnerable():
-                player2.take_damage(zombie.damage)
-        
-        # Update coins
-        for coin in list(coins):
-            if coin.rect.colliderect(player1.rect):
-                player1_coins += coin.value
-                coins.remove(coin)
-            elif coin.rect.colliderect(player2.rect):
-                player2_coins += coin.value
-                coins.remove(coin)
-            elif not coin.update(dt):
-                coins.remove(coin)
-        
-        # Check stage completion
-        if check_stage_completion():
-            current_state = STAGE_TRANSITION
-    
-    elif current_state == STAGE_TRANSITION:
-        if pygame.time.get_ticks() - stage_transition_timer > stage_transition_duration:
-            current_state = PLAYING
-            spawn_interval = max(500, 2000 - (current_stage - 1) * 300)
-        
-        # Draw everything
-        screen.fill(BLACK)
-        ui.draw_stage_transition(current_stage)
-    
-    elif current_state == GAME_OVER:
-        draw_game_over()
-    
-    if current_state == PLAYING:
-        # Draw everything
-        screen.fill(BLACK)
-        
-        for coin in coins:
-            coin.draw()
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                mouse_pos = to_logical(screen, pygame.mouse.get_pos())
+                
+                if game.state == MENU:
+                    button_rect = draw_menu()
+                    if button_rect.collidepoint(mouse_pos):
+                        if loading is not None:
+                            loading = advance_loading(loading, None)
+                        asset_streamer.release(TITLE_SCREEN, (SCREEN_WIDTH, SCREEN_HEIGHT))
+                        game.start()
+                        if recorder is not None:
+                            recorder.mark_start()
+                
+                elif game.state == GAME_OVER:
+                    button_rect = draw_game_over()
+                    if button_rect.collidepoint(mouse_pos):
+                        game.start()
+                        if recorder is not None:
+                            recorder.mark_start()
         
-        for zombie in zombies:
-            zombie.draw()
+        asset_streamer.poll()
+        profiler.count("asset_kb", asset_streamer.used // 1024)
+        if loading is not None:
+            loading = advance_loading(loading)
+            if loading is None and quit_when_loaded:
+                running = False
+        profiler.mark("events")
+        keys = pygame.key.get_pressed()
+        steps = 0
+        while accumulator >= SIM_DT and steps < MAX_STEPS_PER_FRAME:
+            game.step(keys, SIM_DT)
+            if recorder is not None:
+                recorder.record(keys, game)
+            accumulator -= SIM_DT
+            steps += 1
+        if accumulator >= SIM_DT:
+            # Too far behind: let the game slow down rather than spiral
+            accumulator %= SIM_DT
+        game.alpha = accumulator / SIM_DT
         
-        player1.draw()
-        player2.draw()
+        if game.state == MENU:
+            title_screen = asset_streamer.get(TITLE_SCREEN, (SCREEN_WIDTH, SCREEN_HEIGHT))
+            items = [("menu", screen_rect, id(title_screen), draw_menu)]
+        elif game.state == GAME_OVER:
+            items = [("game_over", screen_rect, GAME_OVER, draw_game_over)]
+        else:
+            items = game.drawables()
+        if profiler.show_overlay:
+            items.append(("profiler", profiler.overlay_rect(), profiler.frame_count,
+                          lambda: profiler.draw_overlay(screen, font_small)))
         
-        ui.draw_health_bar(player1.health, player1.max_health, SCREEN_WIDTH - 210, SCREEN_HEIGHT - 30, "Player 1")
-        ui.draw_health_bar(player2.health, player2.max_health, 10, SCREEN_HEIGHT - 30, "Player 2")
-        ui.draw_coins(player1_coins, SCREEN_WIDTH - 100, SCREEN_HEIGHT - 60)
-        ui.draw_coins(player2_coins, 10, SCREEN_HEIGHT - 60)
-        ui.draw_stage(current_stage, SCREEN_WIDTH // 2 - 50, 10)
+        if renderer is not None:
+            dirty = renderer.draw(items)
+            profiler.mark("draw")
+            renderer.present(dirty)
+        else:
+            screen.fill(BLACK)
+            for item in items:
+                item[3]()
+            profiler.mark("draw")
+            present(screen)
+        startup.mark("first_frame")
+        if report_startup and loading is None:
+            print(startup.report(), flush=True)
+            report_startup = False
+        profiler.mark("present")
+        profiler.end_frame()
     
-    pygame.display.flip()
+    export_profile()
+    if recorder is not None:
+        recorder.save(record_path, game)
+        print(f"Recorded {recorder.steps} steps to {record_path} (seed {seed})")
+    asset_streamer.stop()
+    pygame.quit()
+    sys.exit()
+
+def export_profile():
+    """Write the profiler's buffered frames to the --trace path, if one was given"""
+    path = cli_option("--trace")
+    if "--trace" not in sys.argv or not profiler.frames:
+        return
+    path = path or "trace.json"
+    count = profiler.export_trace(path)
+    stats = profiler.stats()
+    print(f"Wrote {count} trace events to {path} "
+          f"(p50 {stats['p50']:.2f} ms, p95 {stats['p95']:.2f} ms, p99 {stats['p99']:.2f} ms)")
+
+def run_headless(frames, seed=None, inputs=None, dt=SIM_DT, use_swarm=USE_SWARM, use_lod=USE_LOD):
+    """Simulate a game with no rendering and no frame cap.
+
+    inputs(game, frame) returns the key state for each frame; the default holds
+    nothing. Stops early on game over. Returns the Game for inspection.
+    """
+    init()
+    load_sprite_atlas()
+    preload_sprites()
+    game = Game(screen, seed=seed, use_swarm=use_swarm, use_lod=use_lod)
+    game.start()
+    for frame in range(frames):
+        profiler.begin_frame()
+        game.step(inputs(game, frame) if inputs else NO_KEYS, dt)
+        profiler.end_frame()
+        if game.state == GAME_OVER:
+            break
+    return game
 
-pygame.quit()
-sys.exit()
\ No newline at end of file
+if __name__ == "__main__":
+    if "--headless" in sys.argv:
+        import argparse
+        parser = argparse.ArgumentParser(description="Run Attack On Heec without a window")
+        parser.add_argument("--headless", action="store_true")
+        parser.add_argument("--swarm", action="store_true")
+        parser.add_argument("--lod", action="store_true")
+        parser.add_argument("--ai-budget", type=int)
+        parser.add_argument("--frames", type=int, default=60 * 60)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--profile", action="store_true")
+        parser.add_argument("--trace")
+        args = parser.parse_args()
+        if args.trace:
+            profiler.enable()
+        game = run_headless(args.frames, seed=args.seed)
+        print(f"stage {game.current_stage}, state {game.state}, "
+              f"zombies {len(game.zombies)}, coins {game.player1_coins}/{game.player2_coins}, "
+              f"hp {game.player1.health}/{game.player2.health}, ticks {game.clock.get_ticks()}")
+        export_profile()
+    else:
+        main()
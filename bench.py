@@ -0,0 +1,347 @@
+"""Scripted load scenarios for measuring how the game loop scales.
+
+    python bench.py [--frames N] [--only NAME ...] [--swarm] [--lod]
+                    [--render-size WxH] [--scale-mode scaled|integer]
+    python bench.py --check-dirty [--frames N] [--only NAME ...]
+                    [--output results.json] [--baseline baseline.json]
+                    [--save-baseline baseline.json] [--tolerance 0.15]
+
+Each scenario runs the real Game on the SDL dummy driver and reports mean
+update/collision/draw time per frame, frame-time percentiles, FPS and traced
+memory as JSON. The "startup" entry times fresh attack.py processes from import
+to the first menu frame and to all sprites loaded. With --baseline, scenarios
+whose mean frame time (or startup whose time to first frame) grew by more than
+the tolerance are reported and the exit status is 1.
+
+--check-dirty runs the scenarios through the dirty-rectangle renderer instead,
+compares every frame with a full redraw, and exits with status 1 on any difference.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+import attack
+from profiler import percentile
+from render import DirtyRenderer, RenderTarget, present
+from attack import (PLAYING, SCREEN_HEIGHT, SCREEN_WIDTH, SIM_DT, STAGE_BOSSES, Game, KeyState,
+                    zombie_types)
+
+HORDE_SIZES = [10, 50, 100, 250, 500, 1000, 2500, 5000]
+# Two pillars and a crossbar for the flow-field scenarios
+MAZE_WALLS = [(200, 100, 40, 400), (560, 100, 40, 400), (300, 250, 200, 40)]
+MEMORY_FRAMES = 10
+STARTUP_RUNS = 3
+DT = SIM_DT
+
+ATTACK_KEYS = KeyState([attack.PLAYER1_ATTACK, attack.PLAYER2_ATTACK])
+
+
+def idle_inputs(game, frame):
+    return attack.NO_KEYS
+
+
+def pacing_inputs(game, frame):
+    """Both players walk back and forth so zombies keep re-targeting"""
+    if (frame // 60) % 2:
+        return KeyState([attack.PLAYER1_LEFT, attack.PLAYER2_RIGHT])
+    return KeyState([attack.PLAYER1_RIGHT, attack.PLAYER2_LEFT])
+
+
+def attack_inputs(game, frame):
+    return ATTACK_KEYS
+
+
+def gunfire_inputs(game, frame):
+    """Player 2 sweeps up and down the screen holding fire"""
+    if (frame // 90) % 2:
+        return KeyState([attack.PLAYER2_ATTACK, attack.PLAYER2_UP])
+    return KeyState([attack.PLAYER2_ATTACK, attack.PLAYER2_DOWN])
+
+
+def edge_position(rng, margin):
+    side = rng.randint(0, 3)
+    if side == 0:
+        return rng.randint(0, SCREEN_WIDTH), -margin
+    if side == 1:
+        return SCREEN_WIDTH + margin, rng.randint(0, SCREEN_HEIGHT)
+    if side == 2:
+        return rng.randint(0, SCREEN_WIDTH), SCREEN_HEIGHT + margin
+    return -margin, rng.randint(0, SCREEN_HEIGHT)
+
+
+def prepare(game):
+    """Start a game whose players cannot die and whose stage spawner stays quiet.
+
+    The stage is left with zombies still to spawn, so it never completes and a
+    scenario with no zombies (the coin floors) keeps timing PLAYING frames.
+    """
+    game.start()
+    for player in (game.player1, game.player2):
+        player.health = player.max_health = 10 ** 9
+    game.spawn_interval = float("inf")
+
+
+def setup_horde(count, bosses=0, spread=False, walls=(), margin=50):
+    def setup(game):
+        prepare(game)
+        game.set_walls(walls)
+        rng = game.rng
+        stage = game.current_stage
+        # Same stats as the game's own spawner, so the hordes follow BALANCE
+        health = int(game.stage_value("zombie_health", stage))
+        damage = int(game.stage_value("zombie_damage", stage))
+        speed = game.stage_value("zombie_speed", stage)
+        for _ in range(count):
+            if spread:
+                x, y = rng.randint(0, SCREEN_WIDTH), rng.randint(0, SCREEN_HEIGHT)
+            else:
+                x, y = edge_position(rng, margin)
+            game.add_zombie(x, y, health, damage, speed, rng.choice(zombie_types))
+        health = int(game.stage_value("boss_health", stage))
+        damage = int(game.stage_value("boss_damage", stage))
+        speed = game.stage_value("boss_speed", stage)
+        boss_types = list(STAGE_BOSSES.values())
+        for i in range(bosses):
+            x, y = edge_position(rng, 100)
+            game.add_zombie(x, y, health, damage, speed, boss_types[i % len(boss_types)], is_boss=True)
+    return setup
+
+
+def setup_coins(count):
+    def setup(game):
+        prepare(game)
+        rng = game.rng
+        for _ in range(count):
+            game.add_coin(rng.randint(0, SCREEN_WIDTH), rng.randint(0, SCREEN_HEIGHT), merge=False)
+    return setup
+
+
+def scenarios():
+    """(name, setup, inputs) for every scenario, cheapest first"""
+    result = [(f"horde_{count}", setup_horde(count), pacing_inputs) for count in HORDE_SIZES]
+    result += [
+        ("coins_500", setup_coins(500), pacing_inputs),
+        ("coins_2000", setup_coins(2000), pacing_inputs),
+        ("bosses_20", setup_horde(0, bosses=20), pacing_inputs),
+        ("bosses_5_horde_200", setup_horde(200, bosses=5), pacing_inputs),
+        ("attack_spam_500", setup_horde(500, spread=True), attack_inputs),
+        ("gunfire_horde_500", setup_horde(500), gunfire_inputs),
+        ("idle_horde_500", setup_horde(500), idle_inputs),
+        ("maze_horde_500", setup_horde(500, walls=MAZE_WALLS), pacing_inputs),
+        ("distant_horde_1000", setup_horde(1000, margin=600), pacing_inputs),
+    ]
+    return result
+
+
+def check_dirty_rects(setup, inputs, frames, use_swarm=False, seed=0, use_lod=False):
+    """Frames on which the dirty-rectangle renderer's picture differs from a full redraw"""
+    screen = attack.screen
+    surface = screen.surface if isinstance(screen, RenderTarget) else screen
+    game = Game(screen, seed=seed, use_swarm=use_swarm, use_lod=use_lod)
+    setup(game)
+    renderer = DirtyRenderer(screen, attack.BLACK)
+    mismatches = []
+    for frame in range(frames):
+        game.step(inputs(game, frame), DT)
+        renderer.draw(game.drawables())
+        painted = surface.copy()
+        game.draw()
+        if pygame.image.tobytes(painted, "RGB") != pygame.image.tobytes(surface, "RGB"):
+            mismatches.append(frame)
+        # The renderer's next frame builds on its own output, so put that back
+        surface.blit(painted, (0, 0))
+    return mismatches
+
+
+def measure_memory(setup, inputs, use_swarm, use_lod, seed):
+    tracemalloc.start()
+    try:
+        game = Game(attack.screen, seed=seed, use_swarm=use_swarm, use_lod=use_lod)
+        setup(game)
+        for frame in range(MEMORY_FRAMES):
+            game.step(inputs(game, frame), DT)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return current, peak
+
+
+def run_scenario(setup, inputs, frames, use_swarm=False, seed=0, use_lod=False):
+    screen = attack.screen
+    current_mem, peak_mem = measure_memory(setup, inputs, use_swarm, use_lod, seed)
+
+    game = Game(screen, seed=seed, use_swarm=use_swarm, use_lod=use_lod)
+    setup(game)
+    perf = time.perf_counter
+    update_ms, collision_ms, draw_ms, frame_ms = [], [], [], []
+    for frame in range(frames):
+        keys = inputs(game, frame)
+        start = perf()
+        game.clock.advance(DT)
+        if game.state == PLAYING:
+            game.update_entities(keys, DT)
+            after_update = perf()
+            game.resolve_collisions(DT)
+        else:
+            game.step(keys, 0)
+            after_update = perf()
+        after_collision = perf()
+        game.draw()
+        present(screen)
+        end = perf()
+        update_ms.append((after_update - start) * 1000)
+        collision_ms.append((after_collision - after_update) * 1000)
+        draw_ms.append((end - after_collision) * 1000)
+        frame_ms.append((end - start) * 1000)
+    assert game.state == PLAYING, f"scenario left PLAYING (state {game.state}), so it timed the wrong screen"
+
+    ordered = sorted(frame_ms)
+    mean_frame = sum(frame_ms) / len(frame_ms)
+    return {
+        "frames": frames,
+        "zombies_end": len(game.zombies),
+        "coins_end": len(game.coins),
+        "update_ms": sum(update_ms) / frames,
+        "collision_ms": sum(collision_ms) / frames,
+        "draw_ms": sum(draw_ms) / frames,
+        "frame_ms": mean_frame,
+        "frame_ms_p50": percentile(ordered, 0.50),
+        "frame_ms_p95": percentile(ordered, 0.95),
+        "frame_ms_p99": percentile(ordered, 0.99),
+        "fps": 1000.0 / mean_frame if mean_frame else float("inf"),
+        "traced_memory_kb": current_mem // 1024,
+        "traced_memory_peak_kb": peak_mem // 1024,
+    }
+
+
+def measure_startup(runs=STARTUP_RUNS):
+    """Best-of-runs startup milestones in ms from attack.py --startup-report, or None if it printed none"""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "attack.py")
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy")
+    best = {}
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, script, "--startup-report", "--quit-when-loaded"],
+                                capture_output=True, text=True, env=env, timeout=120).stdout
+        line = next((line for line in output.splitlines() if line.startswith("Startup: ")), None)
+        if line is None:
+            return None
+        for milestone in line[len("Startup: "):].split(", "):
+            name, ms, _ = milestone.rsplit(" ", 2)
+            best[name] = min(best.get(name, float("inf")), float(ms))
+    return best
+
+
+def compare(results, baseline, tolerance):
+    """Scenario names whose mean frame time regressed past the tolerance"""
+    regressions = []
+    startup, base = results.get("startup"), baseline.get("startup")
+    if startup and base and base.get("first_frame"):
+        ratio = startup["first_frame"] / base["first_frame"]
+        flag = "REGRESSION" if ratio > 1 + tolerance else ""
+        print(f"{'startup first_frame':24s} {base['first_frame']:9.0f} -> {startup['first_frame']:9.0f} ms  "
+              f"x{ratio:5.2f} {flag}", file=sys.stderr)
+        if flag:
+            regressions.append("startup")
+    for name, result in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        ratio = result["frame_ms"] / base["frame_ms"] if base["frame_ms"] else 1.0
+        flag = "REGRESSION" if ratio > 1 + tolerance else ""
+        print(f"{name:24s} {base['frame_ms']:9.3f} -> {result['frame_ms']:9.3f} ms  "
+              f"x{ratio:5.2f} {flag}", file=sys.stderr)
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Attack On Heec under scripted load")
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--only", nargs="*", help="run only scenarios with these names (or startup)")
+    parser.add_argument("--swarm", action="store_true", help="use the NumPy zombie swarm")
+    parser.add_argument("--lod", action="store_true", help="time-slice off-screen zombie AI")
+    parser.add_argument("--render-size", help="internal render resolution, e.g. 400x300")
+    parser.add_argument("--scale-mode", choices=["scaled", "integer"], help="how frames reach the window")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results JSON here instead of stdout")
+    parser.add_argument("--baseline", help="compare against a stored results JSON")
+    parser.add_argument("--save-baseline", help="also store results as a new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    parser.add_argument("--check-dirty", action="store_true",
+                        help="instead of timing, check --dirty-rects output against full redraws")
+    args = parser.parse_args()
+
+    if args.swarm and attack.ZombieSwarm is None:
+        parser.error("--swarm needs NumPy")
+
+    attack.init()
+    attack.load_sprite_atlas()
+    attack.preload_sprites()
+
+    if args.check_dirty:
+        failed = False
+        for name, setup, inputs in scenarios():
+            if args.only and name not in args.only:
+                continue
+            mismatches = check_dirty_rects(setup, inputs, args.frames, args.swarm, args.seed, args.lod)
+            first = f", first at frame {mismatches[0]}" if mismatches else ""
+            print(f"{name:24s} {len(mismatches)} of {args.frames} frames differ{first}", file=sys.stderr)
+            failed = failed or bool(mismatches)
+        sys.exit(1 if failed else 0)
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "swarm": args.swarm,
+            "lod": args.lod,
+            "render_size": "x".join(map(str, attack.RENDER_SIZE)),
+            "scale_mode": attack.SCALE_MODE,
+            "seed": args.seed,
+        },
+        "scenarios": {},
+    }
+    if not args.only or "startup" in args.only:
+        results["startup"] = measure_startup()
+        if results["startup"]:
+            print(f"{'startup':24s} first frame {results['startup'].get('first_frame', 0):.0f} ms, "
+                  f"assets {results['startup'].get('assets', 0):.0f} ms", file=sys.stderr)
+    for name, setup, inputs in scenarios():
+        if args.only and name not in args.only:
+            continue
+        result = run_scenario(setup, inputs, args.frames, args.swarm, args.seed, args.lod)
+        results["scenarios"][name] = result
+        print(f"{name:24s} {result['frame_ms']:9.3f} ms/frame  {result['fps']:8.1f} fps  "
+              f"(update {result['update_ms']:.3f}, collision {result['collision_ms']:.3f}, "
+              f"draw {result['draw_ms']:.3f})", file=sys.stderr)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            f.write(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import pygame
+
+
+class MaskCollider:
+    """Pixel-accurate hit tests behind a cheap rect prefilter.
+
+    The sprite cache and animations hand out the same surface for a given frame,
+    scale and flip every time, so masks are keyed by surface and built once each.
+    Every test first compares the rects the surfaces are drawn at; only pairs that
+    overlap there reach the mask test. stats counts both kinds of test.
+    """
+    def __init__(self):
+        self.masks = {}  # Surface -> Mask
+        self.bodies = {}  # Surface -> bounding rect of its opaque pixels
+        self.solids = {}  # (w, h) -> fully set Mask, for testing against plain rects
+        self.stats = {"rect_tests": 0, "mask_tests": 0}
+
+    def mask(self, surface):
+        mask = self.masks.get(surface)
+        if mask is None:
+            mask = pygame.mask.from_surface(surface)
+            self.masks[surface] = mask
+        return mask
+
+    def prebuild(self, surfaces):
+        for surface in surfaces:
+            self.mask(surface)
+
+    def body(self, surface, topleft):
+        """Bounding rect of surface's opaque pixels when drawn at topleft"""
+        bounds = self.bodies.get(surface)
+        if bounds is None:
+            rects = self.mask(surface).get_bounding_rects()
+            bounds = rects[0].unionall(rects[1:]) if rects else pygame.Rect(0, 0, 0, 0)
+            self.bodies[surface] = bounds
+        return bounds.move(topleft)
+
+    def solid(self, size):
+        mask = self.solids.get(size)
+        if mask is None:
+            mask = pygame.mask.Mask(size, fill=True)
+            self.solids[size] = mask
+        return mask
+
+    def overlap(self, surface_a, topleft_a, surface_b, topleft_b):
+        """True when the opaque pixels of two surfaces drawn at these positions touch"""
+        self.stats["rect_tests"] += 1
+        if not surface_a.get_rect(topleft=topleft_a).colliderect(surface_b.get_rect(topleft=topleft_b)):
+            return False
+        self.stats["mask_tests"] += 1
+        offset = (topleft_b[0] - topleft_a[0], topleft_b[1] - topleft_a[1])
+        return self.mask(surface_a).overlap(self.mask(surface_b), offset) is not None
+
+    def overlap_rect(self, surface, topleft, rect):
+        """True when rect covers any opaque pixel of surface drawn at topleft"""
+        self.stats["rect_tests"] += 1
+        if not rect.colliderect(surface.get_rect(topleft=topleft)):
+            return False
+        self.stats["mask_tests"] += 1
+        offset = (rect.x - topleft[0], rect.y - topleft[1])
+        return self.mask(surface).overlap(self.solid(rect.size), offset) is not None
+
+    def clip_line(self, surface, topleft, x0, y0, x1, y1):
+        """First opaque pixel of surface drawn at topleft along the segment, or None"""
+        self.stats["rect_tests"] += 1
+        clipped = surface.get_rect(topleft=topleft).clipline(x0, y0, x1, y1)
+        if not clipped:
+            return None
+        self.stats["mask_tests"] += 1
+        mask = self.mask(surface)
+        (cx0, cy0), (cx1, cy1) = clipped
+        left, top = topleft
+        steps = max(abs(cx1 - cx0), abs(cy1 - cy0))
+        # Walk the clipped part a pixel at a time from the end nearest (x0, y0)
+        for i in range(steps + 1):
+            x = cx0 + (cx1 - cx0) * i // steps if steps else cx0
+            y = cy0 + (cy1 - cy0) * i // steps if steps else cy0
+            if mask.get_at((x - left, y - top)):
+                return x, y
+        return None
+
+    def take_stats(self):
+        """The counts since the last call, which start again from zero"""
+        stats = self.stats
+        self.stats = {"rect_tests": 0, "mask_tests": 0}
+        return stats
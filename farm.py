@@ -0,0 +1,199 @@
+"""Headless batch games across a grid of balance settings, on a process pool.
+
+    python farm.py [--param NAME=V1,V2,...] ... [--seeds N] [--bot hunter]
+                   [--frames N] [--jobs N] [--output report.json]
+
+Every combination of --param values (names are BALANCE keys in attack.py) is
+played --seeds times by scripted bots, one game per task. The report has, per
+configuration, the survival and clear rates, mean stage reached, time to clear,
+coin income and per-frame simulation cost, and is printed as JSON.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import attack
+from attack import GAME_OVER, SIM_DT, KeyState, max_stages
+from profiler import percentile
+
+ATTACK_REACH = 70  # Horizontal distance the bot closes to before swinging
+LANE_TOLERANCE = 20
+
+
+def player_keys(player, target, held):
+    """Swing (or shoot) when the attack would land on target, otherwise walk into position"""
+    # Hits are pixel accurate, so line up the visible bodies rather than the rects
+    body = attack.collider.body(target.image, target.rect.topleft)
+    px, py = player.body_rect().center
+    tx, ty = body.center
+    dx, dy = tx - px, ty - py
+    if player.shooter:
+        # Shots fly straight along the facing direction
+        muzzle_y = player.muzzle()[1]
+        if body.top + 4 <= muzzle_y < body.bottom - 4 and (dx > 0) == player.facing_right:
+            held.append(player.attack_key)
+            return
+        if abs(dy) > LANE_TOLERANCE:
+            held.append(player.down_key if dy > 0 else player.up_key)
+        elif (dx > 0) != player.facing_right:
+            held.append(player.right_key if dx > 0 else player.left_key)
+        return
+    if attack.collider.overlap_rect(target.image, target.rect.topleft, player.reach_rect()):
+        held.append(player.attack_key)
+        return
+    if dy < -LANE_TOLERANCE:
+        held.append(player.up_key)
+    elif dy > LANE_TOLERANCE:
+        held.append(player.down_key)
+    if abs(dx) > ATTACK_REACH or (dx > 0) != player.facing_right:
+        held.append(player.right_key if dx > 0 else player.left_key)
+
+
+def hunter_bot(game, frame):
+    """Each player goes for its nearest zombie, or the nearest coin when there are none"""
+    held = []
+    for player in (game.player1, game.player2):
+        if player.health <= 0:
+            continue
+        targets = game.zombies or game.coins
+        if not targets:
+            continue
+        px, py = player.rect.center
+        target = min(targets, key=lambda t: (t.rect.centerx - px) ** 2 + (t.rect.centery - py) ** 2)
+        if game.zombies:
+            player_keys(player, target, held)
+        else:
+            tx, ty = target.rect.center
+            if abs(tx - px) > 5:
+                held.append(player.right_key if tx > px else player.left_key)
+            if abs(ty - py) > 5:
+                held.append(player.down_key if ty > py else player.up_key)
+    return KeyState(held)
+
+
+def idle_bot(game, frame):
+    return attack.NO_KEYS
+
+
+BOTS = {"hunter": hunter_bot, "idle": idle_bot}
+
+
+def play(task):
+    """Play one game to game over, the last stage cleared or the frame limit"""
+    balance, seed, bot, frames = task
+    inputs = BOTS[bot]
+    game = attack.Game(attack.screen, seed=seed, use_swarm=False, use_lod=False, balance=balance)
+    game.start()
+    stage_frames = {}
+    step_ms = []
+    perf = time.perf_counter
+    cleared_frame = None
+    for frame in range(frames):
+        start = perf()
+        game.step(inputs(game, frame), SIM_DT)
+        step_ms.append((perf() - start) * 1000)
+        stage = game.current_stage
+        if stage not in stage_frames:
+            stage_frames[stage] = frame
+        if game.state == GAME_OVER:
+            break
+        if (stage == max_stages and not game.zombies and
+                game.zombies_spawned >= game.stage_zombie_count(stage)):
+            cleared_frame = frame
+            break
+    step_ms.sort()
+    return {
+        "survived": game.state != GAME_OVER,
+        "cleared": cleared_frame is not None,
+        "stage": game.current_stage,
+        "frames": len(step_ms),
+        "clear_seconds": cleared_frame * SIM_DT / 1000 if cleared_frame is not None else None,
+        "stage_seconds": {stage: frame * SIM_DT / 1000 for stage, frame in stage_frames.items()},
+        "coins": game.player1_coins + game.player2_coins,
+        "step_ms": sum(step_ms) / len(step_ms),
+        "step_ms_p95": percentile(step_ms, 0.95),
+    }
+
+
+def worker_init():
+    attack.init()
+    attack.load_sprite_atlas()
+    attack.preload_sprites()
+
+
+def parse_param(text):
+    name, _, values = text.partition("=")
+    if name not in attack.BALANCE:
+        raise argparse.ArgumentTypeError(f"unknown balance setting {name!r}")
+    return name, [float(v) if "." in v else int(v) for v in values.split(",")]
+
+
+def mean(values):
+    return sum(values) / len(values) if values else None
+
+
+def summarise(balance, results):
+    minutes = [r["frames"] * SIM_DT / 60000 for r in results]
+    clears = [r["clear_seconds"] for r in results if r["cleared"]]
+    return {
+        "balance": balance,
+        "games": len(results),
+        "survival_rate": mean([r["survived"] for r in results]),
+        "clear_rate": mean([r["cleared"] for r in results]),
+        "mean_stage": mean([r["stage"] for r in results]),
+        "mean_clear_seconds": mean(clears),
+        "coins_per_minute": mean([r["coins"] / m for r, m in zip(results, minutes) if m]),
+        "step_ms": mean([r["step_ms"] for r in results]),
+        "step_ms_p95": max(r["step_ms_p95"] for r in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep Attack On Heec balance settings with bot games")
+    parser.add_argument("--param", action="append", type=parse_param, default=[],
+                        help="NAME=V1,V2,... BALANCE setting and values to sweep")
+    parser.add_argument("--seeds", type=int, default=8, help="games per configuration")
+    parser.add_argument("--seed", type=int, default=0, help="first game seed")
+    parser.add_argument("--bot", choices=sorted(BOTS), default="hunter")
+    parser.add_argument("--frames", type=int, default=60 * 60 * 10, help="frame limit per game")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--output", help="write the report JSON here instead of stdout")
+    args = parser.parse_args()
+
+    names = [name for name, _ in args.param]
+    configs = [dict(zip(names, values)) for values in itertools.product(*(v for _, v in args.param))]
+    tasks = [(balance, args.seed + i, args.bot, args.frames)
+             for balance in configs for i in range(args.seeds)]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.jobs, initializer=worker_init) as pool:
+        results = list(pool.map(play, tasks, chunksize=max(1, len(tasks) // (args.jobs * 8))))
+    elapsed = time.perf_counter() - start
+
+    report = {"bot": args.bot, "frames": args.frames, "seeds": args.seeds,
+              "elapsed_seconds": elapsed, "configs": []}
+    for index, balance in enumerate(configs):
+        summary = summarise(balance, results[index * args.seeds:(index + 1) * args.seeds])
+        report["configs"].append(summary)
+        print(f"{json.dumps(balance):60s} survive {summary['survival_rate']:5.0%}  "
+              f"clear {summary['clear_rate']:5.0%}  stage {summary['mean_stage']:4.1f}  "
+              f"coins/min {summary['coins_per_minute'] or 0:7.1f}  step {summary['step_ms']:.3f} ms",
+              file=sys.stderr)
+    print(f"{len(tasks)} games in {elapsed:.1f} s", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import heapq
+import math
+
+# Step costs for Dijkstra, scaled by 10 so diagonals stay integers
+STRAIGHT, DIAGONAL = 10, 14
+NEIGHBOURS = [(1, 0, STRAIGHT), (-1, 0, STRAIGHT), (0, 1, STRAIGHT), (0, -1, STRAIGHT),
+              (1, 1, DIAGONAL), (1, -1, DIAGONAL), (-1, 1, DIAGONAL), (-1, -1, DIAGONAL)]
+UNREACHABLE = float("inf")
+
+
+class FlowField:
+    """Distance field toward one target over a grid, shared by every zombie chasing it.
+
+    Cells overlapping a wall are blocked. update(x, y) reruns Dijkstra from the
+    target's cell only when the target has entered a new cell. Each cell then
+    records the centre of its neighbour one step closer, so steering a zombie is
+    a table lookup. Diagonal steps never cut a blocked corner.
+    """
+    def __init__(self, bounds, cell_size=40, walls=()):
+        self.left, self.top = bounds.left, bounds.top
+        self.cell_size = cell_size
+        self.cols = math.ceil(bounds.width / cell_size)
+        self.rows = math.ceil(bounds.height / cell_size)
+        size = self.cols * self.rows
+        self.blocked = bytearray(size)
+        self.distance = [UNREACHABLE] * size
+        # Centre of the next cell toward the target, NaN where there is none
+        self.next_x = [math.nan] * size
+        self.next_y = [math.nan] * size
+        self.target_cell = -1
+        self.version = 0
+        self.set_walls(walls)
+
+    def set_walls(self, walls):
+        """Block every cell a wall rect overlaps and force a rebuild on the next update"""
+        self.blocked[:] = bytes(len(self.blocked))
+        size = self.cell_size
+        for wall in walls:
+            col0 = max(0, (wall.left - self.left) // size)
+            col1 = min(self.cols - 1, (wall.right - 1 - self.left) // size)
+            row0 = max(0, (wall.top - self.top) // size)
+            row1 = min(self.rows - 1, (wall.bottom - 1 - self.top) // size)
+            for row in range(row0, row1 + 1):
+                for col in range(col0, col1 + 1):
+                    self.blocked[row * self.cols + col] = 1
+        self.target_cell = -1
+
+    def cell_index(self, x, y):
+        """Grid index of the cell containing (x, y), or -1 outside the grid"""
+        col = int((x - self.left) // self.cell_size)
+        row = int((y - self.top) // self.cell_size)
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return row * self.cols + col
+        return -1
+
+    def cell_center(self, index):
+        row, col = divmod(index, self.cols)
+        half = self.cell_size / 2
+        return self.left + col * self.cell_size + half, self.top + row * self.cell_size + half
+
+    def update(self, x, y):
+        """Retarget on (x, y); returns True when the field was rebuilt"""
+        index = self.cell_index(x, y)
+        if index == self.target_cell or index < 0:
+            return False
+        self.rebuild(index)
+        return True
+
+    def rebuild(self, target):
+        cols, rows = self.cols, self.rows
+        blocked = self.blocked
+        distance = [UNREACHABLE] * len(blocked)
+        distance[target] = 0
+        heap = [(0, target)]
+        while heap:
+            cost, index = heapq.heappop(heap)
+            if cost > distance[index]:
+                continue
+            row, col = divmod(index, cols)
+            for dc, dr, step in NEIGHBOURS:
+                c, r = col + dc, row + dr
+                if not (0 <= c < cols and 0 <= r < rows):
+                    continue
+                neighbour = r * cols + c
+                if blocked[neighbour]:
+                    continue
+                if dc and dr and (blocked[row * cols + c] or blocked[r * cols + col]):
+                    continue
+                new_cost = cost + step
+                if new_cost < distance[neighbour]:
+                    distance[neighbour] = new_cost
+                    heapq.heappush(heap, (new_cost, neighbour))
+
+        # Point every reachable cell at its cheapest neighbour
+        next_x = [math.nan] * len(blocked)
+        next_y = [math.nan] * len(blocked)
+        for index, cost in enumerate(distance):
+            if cost == UNREACHABLE or index == target:
+                continue
+            row, col = divmod(index, cols)
+            best, best_cost = -1, cost
+            for dc, dr, step in NEIGHBOURS:
+                c, r = col + dc, row + dr
+                if not (0 <= c < cols and 0 <= r < rows):
+                    continue
+                neighbour = r * cols + c
+                if dc and dr and (blocked[row * cols + c] or blocked[r * cols + col]):
+                    continue
+                if distance[neighbour] < best_cost:
+                    best, best_cost = neighbour, distance[neighbour]
+            if best >= 0 and best != target:
+                next_x[index], next_y[index] = self.cell_center(best)
+
+        self.distance = distance
+        self.next_x = next_x
+        self.next_y = next_y
+        self.target_cell = target
+        self.version += 1
+
+    def steer(self, x, y):
+        """Unit direction from (x, y) along the field, or None to head straight for the target"""
+        index = self.cell_index(x, y)
+        if index < 0:
+            return None
+        nx = self.next_x[index]
+        if nx != nx:  # NaN
+            return None
+        dx, dy = nx - x, self.next_y[index] - y
+        dist = max(1, math.hypot(dx, dy))
+        return dx / dist, dy / dist
@@ -0,0 +1,48 @@
+import json
+import os
+
+import pygame
+
+FONT_CACHE_FILE = ".font-cache.json"
+
+
+class FontCache:
+    """pygame.font.SysFont without the system font scan on every start.
+
+    The first lookup of a font name asks pygame to match it, which scans the
+    installed fonts, and the resulting file path (or None for pygame's bundled
+    default) is saved to path. Later runs open that file directly. Fonts are
+    shared between callers asking for the same name and size.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.fonts = {}
+        self.dirty = False
+        try:
+            with open(path) as f:
+                self.paths = json.load(f)
+        except (OSError, ValueError):
+            self.paths = {}
+
+    def font(self, name, size):
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            path = self.paths.get(name)
+            if name not in self.paths or (path is not None and not os.path.exists(path)):
+                path = pygame.font.match_font(name)
+                self.paths[name] = path
+                self.dirty = True
+            font = pygame.font.Font(path, size)
+            self.fonts[key] = font
+        return font
+
+    def save(self):
+        if not self.dirty:
+            return
+        try:
+            with open(self.path, "w") as f:
+                json.dump(self.paths, f)
+            self.dirty = False
+        except OSError:
+            pass  # Read-only install; the scan just runs again next time
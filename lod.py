@@ -0,0 +1,57 @@
+import math
+
+# AI tiers and how many ticks apart each one updates
+TIER_VISIBLE, TIER_NEAR, TIER_FAR = 0, 1, 2
+TIER_INTERVALS = (1, 2, 4)
+# Most ticks of movement one update makes up for; a zombie kept waiting past this loses the rest
+MAX_CATCHUP_STEPS = 2 * TIER_INTERVALS[TIER_FAR]
+
+
+class AIScheduler:
+    """Decides which zombies run their AI on a given tick.
+
+    Zombies inside view (the screen plus a margin) update every tick. Off-screen
+    zombies update every 2nd tick within near_distance of the nearest player and
+    every 4th tick beyond it. No more than budget off-screen updates run per tick,
+    given to the zombies that have waited longest; the rest wait their turn. A
+    zombie's update is told how many ticks it skipped, up to MAX_CATCHUP_STEPS, so
+    its movement covers the missed time.
+    """
+    def __init__(self, view, near_distance=400, budget=200):
+        self.view = view
+        self.near_distance = near_distance
+        self.budget = budget
+        self.stats = {"updated": 0, "deferred": 0}
+
+    def tier(self, rect, player1_center, player2_center):
+        if rect.colliderect(self.view):
+            return TIER_VISIBLE
+        x, y = rect.center
+        distance = min(math.hypot(x - player1_center[0], y - player1_center[1]),
+                       math.hypot(x - player2_center[0], y - player2_center[1]))
+        return TIER_NEAR if distance <= self.near_distance else TIER_FAR
+
+    def due(self, zombies, tick, player1, player2):
+        """Zombies to update this tick, in list order. Each has ai_tick, its last update"""
+        p1, p2 = player1.rect.center, player2.rect.center
+        admitted = []  # (index, zombie) in list order
+        waiting = []  # (ticks waited, index, zombie) for off-screen zombies that are due
+        for index, zombie in enumerate(zombies):
+            tier = self.tier(zombie.rect, p1, p2)
+            if tier == TIER_VISIBLE:
+                admitted.append((index, zombie))
+            elif tick - zombie.ai_tick >= TIER_INTERVALS[tier]:
+                waiting.append((tick - zombie.ai_tick, index, zombie))
+        deferred = 0
+        if len(waiting) > self.budget:
+            # Longest wait first, list order among equals, so nobody is starved
+            waiting.sort(key=lambda entry: (-entry[0], entry[1]))
+            deferred = len(waiting) - self.budget
+            del waiting[self.budget:]
+        admitted.extend((index, zombie) for _, index, zombie in waiting)
+        # Updates still run in list order
+        admitted.sort(key=lambda entry: entry[0])
+        due = [zombie for _, zombie in admitted]
+        self.stats["updated"] = len(due)
+        self.stats["deferred"] = deferred
+        return due
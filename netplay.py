@@ -0,0 +1,691 @@
+"""Two-player games over UDP: an authoritative host and a remote player 2.
+
+    python netplay.py host [--port 5555]
+    python netplay.py join HOST[:PORT]
+    python netplay.py loopback [--frames N] [--zombies N]
+
+The host runs the only simulation. The client sends its player 2 keys every step,
+repeating the last few in each packet so a lost packet costs nothing. The host
+sends a snapshot of the world every few steps: quantised records of the players,
+zombies and coins, delta encoded against the last snapshot the client acknowledged.
+The client predicts its own movement and replays unacknowledged inputs on top of
+each snapshot. Everything else is interpolated between snapshots.
+
+--latency MS, --jitter MS and --loss FRACTION delay and drop outgoing packets on
+either side. loopback runs a host and a client in one process with bots on both
+sides and reports bandwidth and prediction error.
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import struct
+import time
+from collections import deque
+
+DEFAULT_PORT = 5555
+SNAPSHOT_RATE = 20  # Snapshots per second
+INPUT_REDUNDANCY = 8  # Most recent input masks repeated in every input packet
+INPUT_BACKLOG = 6  # Host skips ahead when more inputs than this are queued (~100 ms)
+HISTORY = 64  # Snapshots kept on each side as delta baselines
+NONE = 0xFFFFFFFF  # No tick / no sequence number
+
+MSG_INPUT, MSG_SNAPSHOT = 1, 2
+INPUT = struct.Struct("<BIIB")  # message type, acknowledged snapshot tick, newest input seq, mask count
+SNAPSHOT = struct.Struct("<BIII")  # message type, tick, baseline tick, last applied input seq
+
+# Snapshot sections and the number of integer fields in each of their records:
+#   world   uid 0: clock ms, game state, stage, player 1 coins, player 2 coins
+#   players uid 1, 2: x, y, health, max health, image state, flags
+#   zombies: x, y, health, max health, kind, image state, flags
+#   coins: centre x, centre y
+#   shots (uid is the pool slot): centre x, centre y, x velocity
+SECTIONS = ("world", "players", "zombies", "coins", "shots")
+RECORD_FIELDS = {"world": 5, "players": 6, "zombies": 7, "coins": 2, "shots": 3}
+EMPTY_STATE = {name: {} for name in SECTIONS}
+IMAGE_NAMES = ["Idle", "Walk", "Run", "Attack", "Shot", "Hurt", "Dead", "Recharge"]
+IMAGE_INDEX = {name: index for index, name in enumerate(IMAGE_NAMES)}
+FLAG_FACING, FLAG_BOSS, FLAG_INVULNERABLE, FLAG_FLICKER = 1, 2, 4, 8
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+def encode_delta(state, base, out):
+    """Append what changed from base to state: per section, the changed records and removed uids.
+
+    A changed record is its uid gap, a bitmask of changed fields and the zigzag
+    varint difference of each one, so a zombie that moved a pixel costs 4 bytes.
+    Records new since base are diffed against all zeros.
+    """
+    for name in SECTIONS:
+        new, old = state[name], base[name]
+        changed = [uid for uid in sorted(new) if new[uid] != old.get(uid)]
+        write_varint(out, len(changed))
+        previous = 0
+        for uid in changed:
+            write_varint(out, uid - previous)
+            previous = uid
+            record = new[uid]
+            before = old.get(uid) or (0,) * len(record)
+            mask = 0
+            for bit, (value, old_value) in enumerate(zip(record, before)):
+                if value != old_value:
+                    mask |= 1 << bit
+            out.append(mask)
+            for value, old_value in zip(record, before):
+                if value != old_value:
+                    write_varint(out, zigzag(value - old_value))
+        removed = sorted(uid for uid in old if uid not in new)
+        write_varint(out, len(removed))
+        previous = 0
+        for uid in removed:
+            write_varint(out, uid - previous)
+            previous = uid
+
+
+def decode_delta(data, offset, base):
+    """Inverse of encode_delta: base with the changes in data applied, as a new state"""
+    state = {}
+    for name in SECTIONS:
+        section = dict(base[name])
+        fields = RECORD_FIELDS[name]
+        count, offset = read_varint(data, offset)
+        uid = 0
+        for _ in range(count):
+            gap, offset = read_varint(data, offset)
+            uid += gap
+            record = list(section.get(uid) or (0,) * fields)
+            mask = data[offset]
+            offset += 1
+            for bit in range(fields):
+                if mask & (1 << bit):
+                    diff, offset = read_varint(data, offset)
+                    record[bit] += unzigzag(diff)
+            section[uid] = tuple(record)
+        count, offset = read_varint(data, offset)
+        uid = 0
+        for _ in range(count):
+            gap, offset = read_varint(data, offset)
+            uid += gap
+            del section[uid]
+        state[name] = section
+    return state
+
+
+def zombie_kinds():
+    import attack
+    return attack.zombie_types + [attack.STAGE_BOSSES[stage] for stage in sorted(attack.STAGE_BOSSES)]
+
+
+def capture(game):
+    """Snapshot state of game as {section: {uid: record}}, rounded to whole pixels and milliseconds"""
+    kinds = {kind: index for index, kind in enumerate(zombie_kinds())}
+    world = {0: (round(game.clock.get_ticks()), game.state, game.current_stage,
+                 game.player1_coins, game.player2_coins)}
+    players = {}
+    for uid, player in ((1, game.player1), (2, game.player2)):
+        if player is not None:
+            flags = ((FLAG_FACING if player.facing_right else 0) |
+                     (FLAG_INVULNERABLE if player.invulnerable else 0) |
+                     (FLAG_FLICKER if player.flicker else 0))
+            players[uid] = (player.rect.x, player.rect.y, player.health, player.max_health,
+                            IMAGE_INDEX[player.image_state], flags)
+    zombies = {}
+    for zombie in game.zombies:
+        rect = zombie.rect
+        flags = (FLAG_FACING if zombie.facing_right else 0) | (FLAG_BOSS if zombie.is_boss else 0)
+        zombies[zombie.uid] = (rect.x, rect.y, zombie.health, zombie.max_health,
+                               kinds[zombie.zombie_type], IMAGE_INDEX[zombie.image_state], flags)
+    coins = {coin.uid: coin.rect.center for coin in game.coins}
+    projectiles = game.projectiles
+    shots = {slot: (round(projectiles.x[slot]), round(projectiles.y[slot]), round(projectiles.vx[slot]))
+             for slot in projectiles.active}
+    return {"world": world, "players": players, "zombies": zombies, "coins": coins, "shots": shots}
+
+
+class LossyLink:
+    """Wraps a datagram transport, delaying each packet by latency +- jitter ms and dropping a fraction"""
+    def __init__(self, transport, latency=0, jitter=0, loss=0.0, seed=None):
+        self.transport = transport
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.rng = random.Random(seed)
+        self.stats = {"sent": 0, "dropped": 0, "bytes": 0}
+
+    def sendto(self, data, addr=None):
+        self.stats["sent"] += 1
+        self.stats["bytes"] += len(data)
+        if self.loss and self.rng.random() < self.loss:
+            self.stats["dropped"] += 1
+            return
+        delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter)) / 1000
+        if delay:
+            asyncio.get_running_loop().call_later(delay, self._send, data, addr)
+        else:
+            self._send(data, addr)
+
+    def _send(self, data, addr):
+        if not self.transport.is_closing():
+            self.transport.sendto(data, addr)
+
+
+class NetHost(asyncio.DatagramProtocol):
+    """Host side: collects player 2's inputs from the first client to write, and sends it snapshots"""
+    def __init__(self, snapshot_interval=3, shim=None):
+        self.snapshot_interval = snapshot_interval
+        self.shim = shim or {}
+        self.link = None
+        self.peer = None
+        self.tick = 0  # Simulation steps run
+        self.inputs = {}  # input seq -> player 2 key mask
+        self.next_seq = 0
+        self.mask = 0  # Last applied mask, repeated while the client's inputs are late
+        self.last_input = None
+        self.acked = None
+        self.history = {}  # tick -> state, baselines the client may still acknowledge
+        self.stats = {"snapshots": 0, "full": 0, "bytes": 0, "max_bytes": 0,
+                      "max_zombies": 0, "repeated": 0, "skipped": 0}
+
+    def connection_made(self, transport):
+        self.link = LossyLink(transport, **self.shim)
+
+    def datagram_received(self, data, addr):
+        if len(data) < INPUT.size or data[0] != MSG_INPUT:
+            return
+        if self.peer is None:
+            self.peer = addr
+        elif addr != self.peer:
+            return  # Only one remote player
+        _, ack, seq, count = INPUT.unpack_from(data)
+        first = seq - count + 1
+        for index, mask in enumerate(data[INPUT.size:INPUT.size + count]):
+            if first + index >= self.next_seq:
+                self.inputs[first + index] = mask
+        if ack != NONE and (self.acked is None or ack > self.acked):
+            self.acked = ack
+            for tick in [tick for tick in self.history if tick < ack]:
+                del self.history[tick]
+
+    def next_input(self):
+        """Player 2's key mask for the next step"""
+        inputs = self.inputs
+        if len(inputs) > INPUT_BACKLOG:
+            # Too far behind the client; drop the oldest inputs rather than add latency
+            first = max(inputs) - INPUT_BACKLOG + 1
+            for seq in [seq for seq in inputs if seq < first]:
+                del inputs[seq]
+                self.stats["skipped"] += 1
+            self.next_seq = max(self.next_seq, first)
+        mask = inputs.pop(self.next_seq, None)
+        if mask is None:
+            if self.peer is not None:
+                self.stats["repeated"] += 1
+            return self.mask
+        self.mask = mask
+        self.last_input = self.next_seq
+        self.next_seq += 1
+        return mask
+
+    def send_snapshot(self, game):
+        if self.peer is None:
+            return
+        state = capture(game)
+        baseline = self.acked if self.acked in self.history else None
+        base = self.history[baseline] if baseline is not None else EMPTY_STATE
+        out = bytearray(SNAPSHOT.pack(MSG_SNAPSHOT, self.tick, NONE if baseline is None else baseline,
+                                      NONE if self.last_input is None else self.last_input))
+        encode_delta(state, base, out)
+        self.history[self.tick] = state
+        if len(self.history) > HISTORY:
+            del self.history[next(iter(self.history))]
+        self.link.sendto(bytes(out), self.peer)
+
+        stats = self.stats
+        stats["snapshots"] += 1
+        stats["full"] += baseline is None
+        stats["bytes"] += len(out)
+        stats["max_bytes"] = max(stats["max_bytes"], len(out))
+        stats["max_zombies"] = max(stats["max_zombies"], len(state["zombies"]))
+
+
+class NetClient(asyncio.DatagramProtocol):
+    """Client side: sends player 2's keys, predicts its movement and mirrors snapshots into a Game"""
+    def __init__(self, shim=None):
+        self.shim = shim or {}
+        self.link = None
+        self.seq = -1
+        self.recent = deque(maxlen=INPUT_REDUNDANCY)
+        self.pending = deque(maxlen=120)  # (seq, mask) not yet applied by the host
+        self.key_states = {}
+        self.history = {}  # tick -> decoded state, baselines for later snapshots
+        self.latest_tick = None
+        self.snapshot = None  # (state, last input seq) waiting for apply()
+        self.interval = None  # Fewest steps seen between snapshots
+        self.received_at = None
+        self.host_clock = 0
+        self.zombies = {}  # uid -> mirrored Zombie
+        self.coins = {}  # uid -> mirrored Coin
+        self.stats = {"received": 0, "lost": 0, "stale": 0, "undecodable": 0,
+                      "corrections": 0, "correction_px": 0.0, "max_correction_px": 0.0}
+
+    def connection_made(self, transport):
+        self.link = LossyLink(transport, **self.shim)
+
+    def datagram_received(self, data, addr):
+        if len(data) < SNAPSHOT.size or data[0] != MSG_SNAPSHOT:
+            return
+        _, tick, baseline, last_input = SNAPSHOT.unpack_from(data)
+        stats = self.stats
+        if self.latest_tick is not None and tick <= self.latest_tick:
+            stats["stale"] += 1
+            return
+        base = EMPTY_STATE if baseline == NONE else self.history.get(baseline)
+        if base is None:
+            stats["undecodable"] += 1  # Baseline already dropped; the next ack fixes it
+            return
+        state = decode_delta(data, SNAPSHOT.size, base)
+        self.history[tick] = state
+        if len(self.history) > HISTORY:
+            del self.history[next(iter(self.history))]
+        if self.latest_tick is not None:
+            gap = tick - self.latest_tick
+            self.interval = gap if self.interval is None else min(self.interval, gap)
+            stats["lost"] += gap // self.interval - 1
+        stats["received"] += 1
+        self.latest_tick = tick
+        self.snapshot = (state, None if last_input == NONE else last_input)
+
+    def keys(self, mask):
+        """KeyState holding the player 2 keys set in mask"""
+        import attack
+        keys = self.key_states.get(mask)
+        if keys is None:
+            keys = attack.KeyState([key for bit, key in enumerate(attack.RECORDED_KEYS[5:10])
+                                    if mask & (1 << bit)])
+            self.key_states[mask] = keys
+        return keys
+
+    def send_input(self, mask, game):
+        """Send one step's keys and move the local player 2 straight away"""
+        import attack
+        self.seq += 1
+        self.recent.append(mask)
+        self.pending.append((self.seq, mask))
+        ack = NONE if self.latest_tick is None else self.latest_tick
+        self.link.sendto(INPUT.pack(MSG_INPUT, ack, self.seq, len(self.recent)) + bytes(self.recent))
+        player = game.player2
+        if player is not None and game.state == attack.PLAYING:
+            player.move(self.keys(mask))
+            player.prev_pos = player.rect.topleft
+
+    def apply(self, game):
+        """Mirror the newest snapshot into game, if one arrived since the last call"""
+        if self.snapshot is None:
+            return
+        import attack
+        state, last_input = self.snapshot
+        self.snapshot = None
+        self.received_at = time.perf_counter()
+
+        clock, game.state, stage, game.player1_coins, game.player2_coins = state["world"][0]
+        self.host_clock = clock
+        game.clock.ticks = clock
+        if stage != game.current_stage:
+            game.current_stage = stage
+            game.prefetch_maps()
+
+        players = state["players"]
+        if players and game.player1 is None:
+            game.start()
+            game.state = state["world"][0][1]
+        for uid, record in players.items():
+            player = game.player1 if uid == 1 else game.player2
+            x, y, player.health, player.max_health, image, flags = record
+            player.invulnerable = bool(flags & FLAG_INVULNERABLE)
+            player.flicker = bool(flags & FLAG_FLICKER)
+            if IMAGE_NAMES[image] != player.image_state:
+                player.image_state = IMAGE_NAMES[image]
+                player.anim_start = clock
+            if uid == 2:
+                self.reconcile(game, player, x, y, bool(flags & FLAG_FACING), last_input)
+            else:
+                player.facing_right = bool(flags & FLAG_FACING)
+                player.prev_pos = player.draw_rect().topleft
+                player.rect.topleft = (x, y)
+
+        zombies = state["zombies"]
+        for uid in [uid for uid in self.zombies if uid not in zombies]:
+            game.remove_zombie(self.zombies.pop(uid))
+        kinds = zombie_kinds()
+        for uid, (x, y, health, max_health, kind, image, flags) in zombies.items():
+            zombie = self.zombies.get(uid)
+            if zombie is None:
+                zombie = game.add_zombie(x, y, health, 0, 0, kinds[kind], bool(flags & FLAG_BOSS))
+                self.zombies[uid] = zombie
+            else:
+                zombie.prev_pos = zombie.draw_rect().topleft
+                zombie.rect.topleft = (x, y)
+                game.zombie_grid.move(zombie)
+            zombie.health = health
+            zombie.max_health = max_health
+            zombie.facing_right = bool(flags & FLAG_FACING)
+            zombie.set_image_state(IMAGE_NAMES[image], clock)
+
+        coins = state["coins"]
+        for uid in [uid for uid in self.coins if uid not in coins]:
+            game.remove_coin(self.coins.pop(uid))
+        for uid, (x, y) in coins.items():
+            if uid not in self.coins:
+                self.coins[uid] = game.add_coin(x, y, merge=False)
+
+        # Shots are short-lived; rebuild them from every snapshot
+        game.projectiles.clear()
+        for x, y, vx in state["shots"].values():
+            game.projectiles.spawn(x, y, vx, 0, 0, 1)
+        if game.state != attack.PLAYING:
+            self.pending.clear()
+
+    def reconcile(self, game, player, x, y, facing_right, last_input):
+        """Take the host's position for player 2 and replay the inputs it has not applied yet"""
+        import attack
+        predicted = player.rect.topleft
+        player.rect.topleft = (x, y)
+        player.facing_right = facing_right
+        pending = self.pending
+        while pending and last_input is not None and pending[0][0] <= last_input:
+            pending.popleft()
+        if game.state == attack.PLAYING:
+            for _, mask in pending:
+                player.move(self.keys(mask))
+        player.prev_pos = player.rect.topleft
+        error = math.hypot(player.rect.x - predicted[0], player.rect.y - predicted[1])
+        stats = self.stats
+        stats["corrections"] += 1
+        stats["correction_px"] += error
+        stats["max_correction_px"] = max(stats["max_correction_px"], error)
+
+    def animate(self, game, now):
+        """Advance interpolation and animation frames between snapshots"""
+        import attack
+        if self.received_at is None:
+            return
+        interval = (self.interval or 1) * attack.SIM_DT
+        elapsed = min((now - self.received_at) * 1000, interval)
+        game.alpha = elapsed / interval
+        game.clock.ticks = ticks = self.host_clock + elapsed
+        for entity in game.zombies:
+            entity.image = entity.animations[entity.image_state].frame(ticks - entity.anim_start,
+                                                                       entity.facing_right)
+        for player in (game.player1, game.player2):
+            if player is not None:
+                player.image = player.animations[player.image_state].frame(ticks - player.anim_start,
+                                                                           player.facing_right)
+
+
+def host_keys(local, mask):
+    """Player 1's keys from local and player 2's from the client's mask"""
+    import attack
+    keys = attack.RECORDED_KEYS
+    return attack.KeyState([key for key in keys[:5] if local[key]] +
+                           [key for bit, key in enumerate(keys[5:10]) if mask & (1 << bit)])
+
+
+def client_mask(local):
+    """Player 2 mask from local keys; on the client either player's key set drives player 2"""
+    import attack
+    keys = attack.RECORDED_KEYS
+    mask = 0
+    for bit in range(5):
+        if local[keys[bit]] or local[keys[5 + bit]]:
+            mask |= 1 << bit
+    return mask
+
+
+def handle_events(game, restart):
+    """Pump window events; False once the window is closed"""
+    import attack
+    import pygame
+    import render
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            return False
+        if (restart and event.type == pygame.MOUSEBUTTONDOWN and game.state == attack.GAME_OVER and
+                attack.draw_game_over().collidepoint(render.to_logical(attack.screen, event.pos))):
+            game.start()
+    return True
+
+
+def draw(game, waiting):
+    import attack
+    import render
+    attack.asset_streamer.poll()
+    if game.state == attack.MENU:
+        attack.screen.fill(attack.BLACK)
+        text = attack.text_cache.render(attack.font_medium, waiting, attack.WHITE)
+        attack.screen.blit(text, text.get_rect(center=(attack.SCREEN_WIDTH // 2, attack.SCREEN_HEIGHT // 2)))
+    elif game.state == attack.GAME_OVER:
+        attack.draw_game_over()
+    else:
+        game.draw()
+    render.present(attack.screen)
+
+
+async def host_loop(host, game, inputs, frames=None, render=True, waiting="Waiting for player 2"):
+    """Fixed simulation steps with player 2 from the client, a snapshot every snapshot_interval steps.
+
+    inputs(game, tick) gives player 1's keys. Stops after frames steps or when the window closes.
+    """
+    import attack
+    perf = time.perf_counter
+    frame_time = 1 / attack.RENDER_FPS if render and attack.RENDER_FPS else attack.SIM_DT / 1000
+    accumulator = 0.0
+    last = perf()
+    while frames is None or host.tick < frames:
+        start = perf()
+        accumulator += (start - last) * 1000
+        last = start
+        if render and not handle_events(game, restart=True):
+            break
+        steps = 0
+        while accumulator >= attack.SIM_DT and steps < attack.MAX_STEPS_PER_FRAME:
+            if game.state == attack.MENU and host.peer is not None:
+                game.start()
+            game.step(host_keys(inputs(game, host.tick), host.next_input()), attack.SIM_DT)
+            host.tick += 1
+            if host.tick % host.snapshot_interval == 0:
+                host.send_snapshot(game)
+            accumulator -= attack.SIM_DT
+            steps += 1
+        if accumulator >= attack.SIM_DT:
+            accumulator %= attack.SIM_DT
+        game.alpha = accumulator / attack.SIM_DT
+        if render:
+            draw(game, waiting)
+        await asyncio.sleep(max(0.0, frame_time - (perf() - start)))
+
+
+async def client_loop(client, game, inputs, frames=None, render=True):
+    """Sends inputs(game, step) every simulation step and mirrors the host's snapshots into game"""
+    import attack
+    perf = time.perf_counter
+    frame_time = 1 / attack.RENDER_FPS if render and attack.RENDER_FPS else attack.SIM_DT / 1000
+    accumulator = 0.0
+    last = perf()
+    step = 0
+    while frames is None or step < frames:
+        start = perf()
+        accumulator += (start - last) * 1000
+        last = start
+        if render and not handle_events(game, restart=False):
+            break
+        client.apply(game)
+        steps = 0
+        while accumulator >= attack.SIM_DT and steps < attack.MAX_STEPS_PER_FRAME:
+            client.send_input(client_mask(inputs(game, step)), game)
+            step += 1
+            accumulator -= attack.SIM_DT
+            steps += 1
+        if accumulator >= attack.SIM_DT:
+            accumulator %= attack.SIM_DT
+        client.animate(game, perf())
+        if render:
+            draw(game, "Waiting for the host")
+        await asyncio.sleep(max(0.0, frame_time - (perf() - start)))
+
+
+def report(host=None, client=None, seconds=None):
+    if host is not None:
+        stats = host.stats
+        snapshots = max(1, stats["snapshots"])
+        line = (f"host: {stats['snapshots']} snapshots ({stats['full']} full), "
+                f"{stats['bytes'] / snapshots:.0f} B mean, {stats['max_bytes']} B max, "
+                f"up to {stats['max_zombies']} zombies, "
+                f"{stats['repeated']} late and {stats['skipped']} skipped inputs")
+        if seconds:
+            line += f", {stats['bytes'] / seconds / 1024:.1f} KiB/s"
+        print(line)
+    if client is not None:
+        stats = client.stats
+        corrections = max(1, stats["corrections"])
+        print(f"client: {stats['received']} snapshots received, {stats['lost']} lost, "
+              f"{stats['stale']} out of order, {stats['undecodable']} undecodable; "
+              f"prediction error {stats['correction_px'] / corrections:.2f} px mean, "
+              f"{stats['max_correction_px']:.1f} px max")
+
+
+def shim_options(args, seed=None):
+    return {"latency": args.latency, "jitter": args.jitter, "loss": args.loss, "seed": seed}
+
+
+async def run_host(args):
+    import attack
+    import pygame
+    loop = asyncio.get_running_loop()
+    game = attack.Game(attack.screen, seed=args.seed, streamer=attack.asset_streamer)
+    interval = max(1, round(attack.FPS / args.rate))
+    transport, host = await loop.create_datagram_endpoint(
+        lambda: NetHost(interval, shim_options(args)), local_addr=(args.bind, args.port))
+    start = time.perf_counter()
+    try:
+        await host_loop(host, game, lambda game, tick: pygame.key.get_pressed(),
+                        waiting=f"Waiting for player 2 on port {args.port}")
+    finally:
+        transport.close()
+    report(host, seconds=time.perf_counter() - start)
+
+
+async def run_client(args):
+    import attack
+    import pygame
+    loop = asyncio.get_running_loop()
+    address, _, port = args.address.partition(":")
+    game = attack.Game(attack.screen, use_swarm=False, use_lod=False, streamer=attack.asset_streamer)
+    transport, client = await loop.create_datagram_endpoint(
+        lambda: NetClient(shim_options(args)), remote_addr=(address, int(port or DEFAULT_PORT)))
+    try:
+        await client_loop(client, game, lambda game, step: pygame.key.get_pressed())
+    finally:
+        transport.close()
+    report(client=client)
+
+
+async def run_loopback(args):
+    import attack
+    from farm import hunter_bot
+    loop = asyncio.get_running_loop()
+    balance = None
+    if args.zombies:
+        # Spawn the whole horde quickly so bandwidth is measured with it on the field
+        balance = {"zombie_count_scale": args.zombies / attack.STAGE_ZOMBIE_COUNTS[1], "spawn_interval": 50}
+    game = attack.Game(attack.screen, seed=args.seed, balance=balance)
+    mirror = attack.Game(attack.screen, use_swarm=False, use_lod=False)
+    interval = max(1, round(attack.FPS / args.rate))
+    host_transport, host = await loop.create_datagram_endpoint(
+        lambda: NetHost(interval, shim_options(args, args.seed)), local_addr=("127.0.0.1", 0))
+    port = host_transport.get_extra_info("sockname")[1]
+    client_transport, client = await loop.create_datagram_endpoint(
+        lambda: NetClient(shim_options(args, args.seed + 1)), remote_addr=("127.0.0.1", port))
+
+    # Each side's bot plays the player it controls, from its own view of the game
+    def bot(keys):
+        keys = frozenset(keys)
+        def inputs(game, step):
+            if game.player1 is None:
+                return attack.NO_KEYS
+            return attack.KeyState(hunter_bot(game, step).held & keys)
+        return inputs
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(
+            host_loop(host, game, bot(attack.RECORDED_KEYS[:5]), args.frames, render=False),
+            client_loop(client, mirror, bot(attack.RECORDED_KEYS[5:10]), args.frames, render=False))
+    finally:
+        host_transport.close()
+        client_transport.close()
+    report(host, client, time.perf_counter() - start)
+    print(f"host has {len(game.zombies)} zombies and {len(game.coins)} coins, "
+          f"client shows {len(mirror.zombies)} and {len(mirror.coins)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play Attack On Heec with player 2 on another machine")
+    parser.add_argument("mode", choices=["host", "join", "loopback"])
+    parser.add_argument("address", nargs="?", help="HOST[:PORT] to join")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--bind", default="0.0.0.0", help="address the host listens on")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rate", type=int, default=SNAPSHOT_RATE, help="snapshots per second")
+    parser.add_argument("--latency", type=float, default=0, help="added one-way delay in ms")
+    parser.add_argument("--jitter", type=float, default=0, help="random +- variation of the delay in ms")
+    parser.add_argument("--loss", type=float, default=0.0, help="fraction of packets dropped")
+    parser.add_argument("--frames", type=int, default=600, help="loopback length in steps")
+    parser.add_argument("--zombies", type=int, default=0, help="loopback stage 1 horde size")
+    parser.add_argument("--render-size", help="internal render resolution, e.g. 400x300")
+    parser.add_argument("--scale-mode", choices=["scaled", "integer"], help="how frames reach the window")
+    parser.add_argument("--fullscreen", action="store_true")
+    args = parser.parse_args()
+    if args.mode == "join" and not args.address:
+        parser.error("join needs HOST[:PORT]")
+
+    if args.mode == "loopback":
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import attack
+    attack.init()
+    attack.load_sprite_atlas()
+    attack.preload_sprites()
+    run = {"host": run_host, "join": run_client, "loopback": run_loopback}[args.mode]
+    try:
+        asyncio.run(run(args))
+    finally:
+        attack.asset_streamer.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import heapq
+
+from spatial import SpatialGrid
+
+
+class CoinManager:
+    """Coins on the floor: a grid for pickup, a min-heap for expiry and merging of nearby drops.
+
+    Each coin records the clock time it expires at, and the same time goes on a
+    heap, so expire(now) pops only the coins that are due instead of ticking
+    every coin every step. Picked-up or merged-away coins leave their heap entry
+    behind; it is skipped when it surfaces. A drop within merge_radius of a live
+    coin of the same type adds its value to that coin's stack and restarts its
+    timer. Coins need rect, coin_type, value, expires_at, stack and index, and
+    are recycled through reset(x, y, coin_type).
+    """
+    def __init__(self, factory, cell_size=128, lifetime=10000, merge_radius=40):
+        self.factory = factory  # (x, y, coin_type) -> new coin
+        self.lifetime = lifetime
+        self.merge_radius = merge_radius
+        self.coins = []
+        self.grid = SpatialGrid(cell_size)
+        self.pool = []
+        self.heap = []  # (expires_at, serial, coin)
+        self.serial = 0
+        self.stats = {"merged": 0, "expired": 0}
+
+    def __len__(self):
+        return len(self.coins)
+
+    def drop(self, x, y, now, coin_type=1, merge=True):
+        """Put a coin centred on (x, y); returns it, or the stack it was merged into"""
+        if self.pool:
+            coin = self.pool.pop()
+            coin.reset(x, y, coin_type)
+        else:
+            coin = self.factory(x, y, coin_type)
+        if merge and self.merge_radius:
+            for stack in self.grid.query_radius(x, y, self.merge_radius):
+                if stack.coin_type == coin_type:
+                    stack.value += coin.value
+                    stack.stack += coin.stack
+                    self.pool.append(coin)
+                    self.schedule(stack, now)
+                    self.stats["merged"] += 1
+                    return stack
+        coin.index = len(self.coins)
+        self.coins.append(coin)
+        self.grid.insert(coin)
+        self.schedule(coin, now)
+        return coin
+
+    def schedule(self, coin, now):
+        coin.expires_at = now + self.lifetime
+        self.serial += 1
+        heapq.heappush(self.heap, (coin.expires_at, self.serial, coin))
+
+    def remove(self, coin):
+        coins = self.coins
+        last = coins.pop()
+        if last is not coin:
+            coins[coin.index] = last
+            last.index = coin.index
+        coin.index = -1
+        self.grid.remove(coin)
+        self.pool.append(coin)
+
+    def collect(self, rect):
+        """Remove every coin overlapping rect in one grid query; returns their total value"""
+        total = 0
+        for coin in self.grid.query_rect(rect):
+            total += coin.value
+            self.remove(coin)
+        return total
+
+    def expire(self, now):
+        heap = self.heap
+        while heap and heap[0][0] <= now:
+            expires_at, _, coin = heapq.heappop(heap)
+            # Stale entries: the coin was picked up, or its stack timer restarted
+            if coin.index >= 0 and coin.expires_at == expires_at:
+                self.remove(coin)
+                self.stats["expired"] += 1
+
+    def clear(self):
+        while self.coins:
+            self.remove(self.coins[-1])
+        self.heap.clear()
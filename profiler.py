@@ -0,0 +1,180 @@
+import gc
+import json
+import time
+from collections import deque
+
+import pygame
+
+FRAME_BUDGET_MS = 1000 / 60
+GRAPH_FRAMES = 180
+GRAPH_HEIGHT = 80
+GRAPH_SCALE_MS = 50
+PANEL_WIDTH = 270
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class StartupTimer:
+    """Milliseconds from origin to each named startup milestone, first occurrence only"""
+    def __init__(self, origin=None):
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.marks = {}
+
+    def mark(self, name):
+        if name not in self.marks:
+            self.marks[name] = (time.perf_counter() - self.origin) * 1000
+
+    def report(self):
+        return "Startup: " + ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.marks.items())
+
+
+class FrameProfiler:
+    """Times the phases of each frame into a ring buffer.
+
+    Call begin_frame(), then mark(name) at the end of each phase, then end_frame().
+    Every entry point returns immediately while disabled, so leaving the calls in
+    the loop costs one attribute check each.
+    """
+    def __init__(self, capacity=3600):
+        self.enabled = False
+        self.show_overlay = False
+        self.frames = deque(maxlen=capacity)
+        self.frame_count = 0
+        self.counters = {}
+        self.phases = []
+        self.gc_pauses = []
+        self.frame_start = 0.0
+        self.last_mark = 0.0
+        self.gc_start = None
+        self.origin = time.perf_counter()
+
+    def enable(self):
+        if not self.enabled:
+            self.enabled = True
+            gc.callbacks.append(self._on_gc)
+
+    def disable(self):
+        if self.enabled:
+            self.enabled = False
+            gc.callbacks.remove(self._on_gc)
+
+    def toggle_overlay(self):
+        self.show_overlay = not self.show_overlay
+        if self.show_overlay:
+            self.enable()
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self.gc_start = time.perf_counter()
+        elif self.gc_start is not None:
+            self.gc_pauses.append((self.gc_start, time.perf_counter(), info.get("generation", 0)))
+            self.gc_start = None
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame_start = self.last_mark = time.perf_counter()
+        self.phases = []
+        self.counters = {}
+        self.gc_pauses = []
+
+    def mark(self, name):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases.append((name, self.last_mark, now))
+        self.last_mark = now
+
+    def count(self, name, amount=1):
+        if not self.enabled:
+            return
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def end_frame(self):
+        if not self.enabled or not self.frame_start:
+            return
+        end = time.perf_counter()
+        self.frames.append({
+            "start": self.frame_start,
+            "end": end,
+            "phases": self.phases,
+            "counters": self.counters,
+            "gc": self.gc_pauses,
+        })
+        self.frame_count += 1
+        self.frame_start = 0.0
+
+    def frame_times(self):
+        return [(frame["end"] - frame["start"]) * 1000 for frame in self.frames]
+
+    def stats(self):
+        times = sorted(self.frame_times())
+        return {
+            "frames": len(times),
+            "p50": percentile(times, 0.50),
+            "p95": percentile(times, 0.95),
+            "p99": percentile(times, 0.99),
+            "max": times[-1] if times else 0.0,
+        }
+
+    def overlay_rect(self):
+        return pygame.Rect(6, 36, PANEL_WIDTH, GRAPH_HEIGHT + 96)
+
+    def draw_overlay(self, screen, font):
+        if not self.show_overlay or not self.frames:
+            return
+        recent = self.frame_times()[-GRAPH_FRAMES:]
+        panel = self.overlay_rect()
+        # Drawn on a fresh panel surface and blitted, so scaled render targets can take it too
+        surface = pygame.Surface(panel.size)
+        surface.fill((0, 0, 0))
+        pygame.draw.rect(surface, (90, 90, 90), surface.get_rect(), 1)
+        x0, y0 = 10 - panel.x, 40 - panel.y
+
+        bottom = y0 + GRAPH_HEIGHT
+        for i, ms in enumerate(recent):
+            height = min(GRAPH_HEIGHT, int(ms / GRAPH_SCALE_MS * GRAPH_HEIGHT))
+            color = (0, 200, 0) if ms <= FRAME_BUDGET_MS else (230, 60, 60)
+            pygame.draw.line(surface, color, (x0 + i, bottom), (x0 + i, bottom - height))
+        budget_y = bottom - int(FRAME_BUDGET_MS / GRAPH_SCALE_MS * GRAPH_HEIGHT)
+        pygame.draw.line(surface, (255, 255, 0), (x0, budget_y), (x0 + GRAPH_FRAMES, budget_y))
+
+        stats = self.stats()
+        last = self.frames[-1]
+        lines = [
+            f"p50 {stats['p50']:.1f}  p95 {stats['p95']:.1f}  p99 {stats['p99']:.1f} ms",
+            "  ".join(f"{name} {(end - start) * 1000:.1f}" for name, start, end in last["phases"][:4]),
+            "  ".join(f"{name} {(end - start) * 1000:.1f}" for name, start, end in last["phases"][4:]),
+            f"gc {len(last['gc'])}  " + "  ".join(f"{k} {v}" for k, v in last["counters"].items()),
+        ]
+        for i, line in enumerate(lines):
+            surface.blit(font.render(line, True, (255, 255, 255)), (x0, bottom + 4 + i * 20))
+        screen.blit(surface, panel)
+
+    def export_trace(self, path):
+        """Write the buffered frames in Chrome trace event format (chrome://tracing, Perfetto)"""
+        def us(t):
+            return (t - self.origin) * 1e6
+
+        events = []
+        for index, frame in enumerate(self.frames):
+            events.append({"name": "frame", "ph": "X", "pid": 1, "tid": 1,
+                           "ts": us(frame["start"]), "dur": (frame["end"] - frame["start"]) * 1e6,
+                           "args": {"index": index}})
+            for name, start, end in frame["phases"]:
+                events.append({"name": name, "ph": "X", "pid": 1, "tid": 1,
+                               "ts": us(start), "dur": (end - start) * 1e6})
+            for start, end, generation in frame["gc"]:
+                events.append({"name": f"gc gen{generation}", "ph": "X", "pid": 1, "tid": 2,
+                               "ts": us(start), "dur": (end - start) * 1e6})
+            if frame["counters"]:
+                events.append({"name": "counters", "ph": "C", "pid": 1,
+                               "ts": us(frame["start"]), "args": frame["counters"]})
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(events)
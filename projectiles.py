@@ -0,0 +1,110 @@
+import pygame
+
+
+class ProjectilePool:
+    """Fixed-capacity projectiles in parallel lists, recycled through a stack of free slots.
+
+    Each step a projectile sweeps the segment from its old to its new position.
+    Only targets sharing a grid cell with the segment's bounding box are tested,
+    with Rect.clipline (or against their opaque pixels, given a MaskCollider),
+    and the nearest one along the path takes the hit, so a shot faster than a
+    zombie is wide still cannot pass through it. Spawning and
+    expiring allocate nothing; when every slot is in flight new shots are dropped.
+    """
+    def __init__(self, capacity=256, size=(12, 4), color=(255, 230, 90)):
+        self.capacity = capacity
+        self.x = [0.0] * capacity
+        self.y = [0.0] * capacity
+        self.vx = [0.0] * capacity  # Pixels per step
+        self.vy = [0.0] * capacity
+        self.ttl = [0] * capacity  # Steps left
+        self.damage = [0] * capacity
+        self.active = []  # Slots in flight
+        self.position = [-1] * capacity  # Slot -> index in active
+        self.free = list(range(capacity - 1, -1, -1))
+        self.sweep = pygame.Rect(0, 0, 0, 0)
+        self.image = pygame.Surface(size)
+        self.image.fill(color)
+        self.stats = {"dropped": 0, "tested": 0}
+
+    def __len__(self):
+        return len(self.active)
+
+    def spawn(self, x, y, vx, vy, damage, ttl):
+        """Launch a projectile; returns its slot, or -1 when the pool is exhausted"""
+        if not self.free:
+            self.stats["dropped"] += 1
+            return -1
+        slot = self.free.pop()
+        self.x[slot], self.y[slot] = x, y
+        self.vx[slot], self.vy[slot] = vx, vy
+        self.ttl[slot] = ttl
+        self.damage[slot] = damage
+        self.position[slot] = len(self.active)
+        self.active.append(slot)
+        return slot
+
+    def release(self, slot):
+        index = self.position[slot]
+        last = self.active.pop()
+        if last != slot:
+            self.active[index] = last
+            self.position[last] = index
+        self.position[slot] = -1
+        self.free.append(slot)
+
+    def clear(self):
+        while self.active:
+            self.release(self.active[-1])
+
+    def update(self, grid, on_hit, collider=None, reach=(0, 0)):
+        """Advance every projectile one step; on_hit(target, damage) for each one that struck
+
+        reach is how far a target's image can extend right and down past the rect
+        the grid buckets it by, so the sweep looks that much further up and left.
+        """
+        xs, ys, vxs, vys, ttls = self.x, self.y, self.vx, self.vy, self.ttl
+        reach_x, reach_y = reach
+        active = self.active
+        sweep = self.sweep
+        tested = 0
+        # Backwards, so a release only ever swaps in a slot that has already moved
+        for index in range(len(active) - 1, -1, -1):
+            slot = active[index]
+            x0, y0 = xs[slot], ys[slot]
+            x1, y1 = x0 + vxs[slot], y0 + vys[slot]
+            sweep.update(min(x0, x1) - reach_x, min(y0, y1) - reach_y,
+                         abs(x1 - x0) + 1 + reach_x, abs(y1 - y0) + 1 + reach_y)
+            hit = None
+            for target in grid.candidates(sweep):
+                if target.state == "dead":
+                    continue
+                tested += 1
+                if collider is not None:
+                    point = collider.clip_line(target.image, target.rect.topleft, x0, y0, x1, y1)
+                else:
+                    clipped = target.rect.clipline(x0, y0, x1, y1)
+                    point = clipped[0] if clipped else None
+                if point is not None:
+                    cx, cy = point
+                    distance = (cx - x0) ** 2 + (cy - y0) ** 2
+                    if hit is None or distance < hit_distance:
+                        hit, hit_distance = target, distance
+            if hit is not None:
+                damage = self.damage[slot]
+                self.release(slot)
+                on_hit(hit, damage)
+                continue
+            ttls[slot] -= 1
+            if ttls[slot] <= 0:
+                self.release(slot)
+            else:
+                xs[slot], ys[slot] = x1, y1
+        self.stats["tested"] = tested
+
+    def draw_rect(self, slot, alpha=1.0):
+        """Screen rect of a projectile, interpolated back toward its previous step by 1 - alpha"""
+        back = 1.0 - alpha
+        rect = self.image.get_rect()
+        rect.center = (round(self.x[slot] - self.vx[slot] * back), round(self.y[slot] - self.vy[slot] * back))
+        return rect
@@ -0,0 +1,261 @@
+import math
+import weakref
+
+import pygame
+
+
+def merge_rects(rects, bounds):
+    """Clip rects to bounds and union the overlapping ones"""
+    merged = []
+    for rect in rects:
+        rect = rect.clip(bounds)
+        if not rect.width or not rect.height:
+            continue
+        index = rect.collidelist(merged)
+        while index != -1:
+            rect.union_ip(merged.pop(index))
+            index = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+class DirtyRenderer:
+    """Repaints only the screen regions whose drawables changed since the last frame.
+
+    Each frame gets a paint-ordered list of (key, bounds, signature, draw) items.
+    An item is dirty when it is new, gone, or its bounds or signature changed. Its
+    old and new bounds are cleared to the background and every item touching them
+    is redrawn under a clip rect. When the dirty area covers more than
+    full_threshold of the screen, it repaints everything and flips instead.
+    """
+    def __init__(self, screen, background=(0, 0, 0), full_threshold=0.5):
+        self.screen = screen
+        self.background = background
+        self.full_threshold = full_threshold
+        # Scaled sprites can spill a pixel past their logical bounds
+        self.margin = screen.redraw_margin if isinstance(screen, RenderTarget) else 0
+        self.previous = {}
+        self.full_redraw = True
+        self.stats = {"dirty_rects": 0, "full_redraws": 0, "partial_redraws": 0, "skipped": 0}
+
+    def invalidate(self):
+        self.full_redraw = True
+
+    def set_background(self, background):
+        self.background = background
+        self.full_redraw = True
+
+    def clear(self, rect=None):
+        if isinstance(self.background, pygame.Surface):
+            if rect is None:
+                self.screen.blit(self.background, (0, 0))
+            else:
+                self.screen.blit(self.background, rect, rect)
+        else:
+            self.screen.fill(self.background, rect)
+
+    def draw(self, items):
+        """Paint the changed regions. Returns the rects to present, or None for a full flip"""
+        current = {}
+        dirty = []
+        for key, bounds, signature, _ in items:
+            current[key] = (bounds, signature)
+            old = self.previous.get(key)
+            if old is None:
+                dirty.append(bounds)
+            elif old != (bounds, signature):
+                dirty.append(old[0])
+                dirty.append(bounds)
+        for key, (bounds, _) in self.previous.items():
+            if key not in current:
+                dirty.append(bounds)
+        self.previous = current
+
+        screen_rect = self.screen.get_rect()
+        dirty = merge_rects(dirty, screen_rect)
+        dirty_area = sum(rect.width * rect.height for rect in dirty)
+        if self.full_redraw or dirty_area > self.full_threshold * screen_rect.width * screen_rect.height:
+            self.full_redraw = False
+            self.stats["full_redraws"] += 1
+            self.clear()
+            for item in items:
+                item[3]()
+            return None
+
+        margin = self.margin
+        for rect in dirty:
+            self.screen.set_clip(rect)
+            self.clear(rect)
+            reach = rect.inflate(2 * margin, 2 * margin) if margin else rect
+            for _, bounds, _, draw in items:
+                if bounds.colliderect(reach):
+                    draw()
+        self.screen.set_clip(None)
+        if dirty:
+            self.stats["partial_redraws"] += 1
+            self.stats["dirty_rects"] += len(dirty)
+        else:
+            self.stats["skipped"] += 1
+        return dirty
+
+    def present(self, rects):
+        present(self.screen, rects)
+
+
+def present(screen, rects=None):
+    """Show the finished frame: flip, update just rects, or scale a RenderTarget to the window"""
+    if isinstance(screen, RenderTarget):
+        screen.present(rects)
+    elif rects is None:
+        pygame.display.flip()
+    elif rects:
+        pygame.display.update(rects)
+
+
+def draw_rect(screen, color, rect, width=0):
+    """pygame.draw.rect that also draws on a RenderTarget"""
+    if isinstance(screen, RenderTarget):
+        screen.draw_rect(color, rect, width)
+    else:
+        pygame.draw.rect(screen, color, rect, width)
+
+
+def to_logical(screen, pos):
+    """Window position (e.g. the mouse) in the coordinates the game draws in"""
+    return screen.to_logical(pos) if isinstance(screen, RenderTarget) else pos
+
+
+def open_display(logical_size, render_size=None, mode="scaled", fullscreen=False):
+    """The surface the game draws on: the window itself, or a RenderTarget when
+    render_size differs from logical_size.
+
+    "scaled" presents through SDL's SCALED mode, which stretches the frame to the
+    window on the GPU. "integer" opens a window a whole multiple of render_size and
+    scales in software with nearest-neighbour pixels, letterboxed when fullscreen.
+    """
+    render_size = tuple(render_size or logical_size)
+    if render_size == tuple(logical_size):
+        # Fullscreen still goes through SCALED, so the desktop mode is left alone
+        return pygame.display.set_mode(logical_size, pygame.SCALED | pygame.FULLSCREEN if fullscreen else 0)
+    return RenderTarget(logical_size, render_size, mode, fullscreen)
+
+
+class RenderTarget:
+    """Offscreen frame at the internal render resolution, drawn on in logical coordinates.
+
+    blit, fill, set_clip and draw_rect take the same coordinates as the window
+    surface would, and scale them to the internal size. A blitted surface is
+    swapped for a copy scaled once and kept for as long as the source lives, so
+    sources must not be drawn on after their first blit. present() puts the
+    frame on the window.
+    """
+    def __init__(self, logical_size, render_size, mode="scaled", fullscreen=False):
+        if mode not in ("scaled", "integer"):
+            raise ValueError(f"unknown scale mode {mode!r}")
+        self.logical_size = tuple(logical_size)
+        self.render_size = tuple(render_size)
+        self.mode = mode
+        self.scale_x = render_size[0] / logical_size[0]
+        self.scale_y = render_size[1] / logical_size[1]
+        self.redraw_margin = math.ceil(1 / min(self.scale_x, self.scale_y))
+        self.scaled = weakref.WeakKeyDictionary()  # Source surface -> copy at render scale
+        self.offset = (0, 0)
+        if mode == "scaled":
+            flags = pygame.SCALED | (pygame.FULLSCREEN if fullscreen else 0)
+            self.window = self.surface = pygame.display.set_mode(render_size, flags)
+            self.factor = 1
+        else:
+            # Largest whole multiple that fits the logical window (or the desktop)
+            if fullscreen:
+                bounds = pygame.display.get_desktop_sizes()[0]
+            else:
+                bounds = logical_size
+            self.factor = max(1, min(bounds[0] // render_size[0], bounds[1] // render_size[1]))
+            size = (render_size[0] * self.factor, render_size[1] * self.factor)
+            if fullscreen:
+                self.window = pygame.display.set_mode(bounds, pygame.FULLSCREEN)
+                self.offset = ((bounds[0] - size[0]) // 2, (bounds[1] - size[1]) // 2)
+            else:
+                self.window = pygame.display.set_mode(size)
+            self.surface = pygame.Surface(render_size).convert()
+
+    def get_rect(self):
+        return pygame.Rect((0, 0), self.logical_size)
+
+    def get_size(self):
+        return self.logical_size
+
+    def rect(self, rect):
+        """Logical rect to the internal pixels it covers"""
+        rect = pygame.Rect(rect)
+        left = math.floor(rect.left * self.scale_x)
+        top = math.floor(rect.top * self.scale_y)
+        return pygame.Rect(left, top, math.ceil(rect.right * self.scale_x) - left,
+                           math.ceil(rect.bottom * self.scale_y) - top)
+
+    def image(self, source):
+        """source at render scale, scaled on first use"""
+        image = self.scaled.get(source)
+        if image is None:
+            width, height = source.get_size()
+            size = (max(1, round(width * self.scale_x)), max(1, round(height * self.scale_y)))
+            try:
+                image = pygame.transform.smoothscale(source, size)
+            except ValueError:  # smoothscale needs 24 or 32-bit pixels
+                image = pygame.transform.scale(source, size)
+            self.scaled[source] = image
+        return image
+
+    def prescale(self, sources):
+        for source in sources:
+            self.image(source)
+
+    def blit(self, source, dest, area=None):
+        x, y = dest[0], dest[1]
+        position = (math.floor(x * self.scale_x), math.floor(y * self.scale_y))
+        if area is not None:
+            area = self.rect(area)
+        return self.surface.blit(self.image(source), position, area)
+
+    def fill(self, color, rect=None):
+        return self.surface.fill(color, self.rect(rect) if rect is not None else None)
+
+    def set_clip(self, rect):
+        self.surface.set_clip(self.rect(rect) if rect is not None else None)
+
+    def draw_rect(self, color, rect, width=0):
+        if width:
+            width = max(1, round(width * min(self.scale_x, self.scale_y)))
+        pygame.draw.rect(self.surface, color, self.rect(rect), width)
+
+    def to_logical(self, pos):
+        x = (pos[0] - self.offset[0]) / self.factor / self.scale_x
+        y = (pos[1] - self.offset[1]) / self.factor / self.scale_y
+        return (int(x), int(y))
+
+    def present(self, rects=None):
+        """Show the frame; with rects (logical), only those regions are rescaled and updated"""
+        if self.mode == "scaled":
+            if rects is None:
+                pygame.display.flip()
+            elif rects:
+                pygame.display.update([self.rect(rect) for rect in rects])
+            return
+        factor, (ox, oy) = self.factor, self.offset
+        if rects is None:
+            size = (self.render_size[0] * factor, self.render_size[1] * factor)
+            pygame.transform.scale(self.surface, size, self.window.subsurface((self.offset, size)))
+            pygame.display.flip()
+            return
+        bounds = self.surface.get_rect()
+        updated = []
+        for rect in rects:
+            source = self.rect(rect).clip(bounds)
+            if not source.width or not source.height:
+                continue
+            target = pygame.Rect(ox + source.x * factor, oy + source.y * factor,
+                                 source.width * factor, source.height * factor)
+            pygame.transform.scale(self.surface.subsurface(source), target.size, self.window.subsurface(target))
+            updated.append(target)
+        if updated:
+            pygame.display.update(updated)
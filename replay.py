@@ -0,0 +1,235 @@
+"""Compact input recordings and deterministic replays.
+
+    python attack.py --record session.aohr [--seed N]
+    python replay.py session.aohr [--render] [--hashes hashes.txt]
+                     [--render-size WxH] [--scale-mode scaled|integer]
+
+A recording holds the RNG seed, the step length, the AI budget, the wave
+balance and one key bitmask per simulation step, run-length encoded, plus a
+state hash every HASH_INTERVAL steps. Replaying feeds the masks back through Game.step as fast as possible,
+checks every stored hash and exits with status 1 on the first mismatch.
+"""
+import argparse
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+
+REPLAY_MAGIC = b"AOHREPL2"
+HEADER = struct.Struct("<qdHHIi")  # seed, dt, flags, hash interval, step count, AI budget
+# followed by the balance settings as a length-prefixed JSON object
+V1_MAGIC = b"AOHREPL1"  # No AI budget or balance; replayed with the defaults
+V1_HEADER = struct.Struct("<qdHHI")
+RUN = struct.Struct("<HH")  # key mask, repeat count
+CHECKPOINT = struct.Struct("<I8s")  # step index, state hash
+HASH_INTERVAL = 60
+START_BIT = 1 << 15  # game.start() was called before this step
+FLAG_SWARM, FLAG_LOD = 1, 2
+
+
+def encode_keys(inputs, keys):
+    """Bitmask of which of keys are held in inputs"""
+    mask = 0
+    for bit, key in enumerate(keys):
+        if inputs[key]:
+            mask |= 1 << bit
+    return mask
+
+
+def state_hash(game):
+    """8-byte digest of everything the simulation carries from one step to the next"""
+    h = hashlib.blake2b(digest_size=8)
+    h.update(struct.pack("<dBBqq", game.clock.get_ticks(), game.state, game.current_stage,
+                         game.player1_coins, game.player2_coins))
+    for player in (game.player1, game.player2):
+        if player is not None:
+            h.update(struct.pack("<iiiid?i", player.rect.x, player.rect.y, player.health,
+                                 player.damage, player.last_attack_time, player.invulnerable, player.ammo))
+    for zombie in game.zombies:
+        rect = zombie.rect
+        h.update(struct.pack("<iiii", rect.x, rect.y, rect.w, zombie.health))
+        h.update(zombie.state.encode())
+    for coin in game.coins:
+        h.update(struct.pack("<iiid", coin.rect.x, coin.rect.y, coin.value, coin.expires_at))
+    projectiles = game.projectiles
+    for slot in projectiles.active:
+        h.update(struct.pack("<ddi", projectiles.x[slot], projectiles.y[slot], projectiles.ttl[slot]))
+    return h.digest()
+
+
+class Recorder:
+    """Collects one key mask per simulation step; call record() right after each Game.step"""
+    def __init__(self, seed, dt, keys, flags=0, hash_interval=HASH_INTERVAL, ai_budget=200, balance=None):
+        self.seed = seed
+        self.dt = dt
+        self.keys = keys
+        self.flags = flags
+        self.hash_interval = hash_interval
+        self.ai_budget = ai_budget
+        self.balance = dict(balance or {})
+        self.runs = []  # [mask, count]
+        self.checkpoints = []
+        self.steps = 0
+        self.start_pending = False
+
+    def mark_start(self):
+        self.start_pending = True
+
+    def record(self, inputs, game):
+        mask = encode_keys(inputs, self.keys)
+        if self.start_pending:
+            mask |= START_BIT
+            self.start_pending = False
+        if self.runs and self.runs[-1][0] == mask and self.runs[-1][1] < 0xFFFF:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([mask, 1])
+        self.steps += 1
+        if self.steps % self.hash_interval == 0:
+            self.checkpoints.append((self.steps - 1, state_hash(game)))
+
+    def save(self, path, game=None):
+        """Write the recording; with game, the final state is stored as a checkpoint too"""
+        checkpoints = list(self.checkpoints)
+        if game is not None and self.steps and (not checkpoints or checkpoints[-1][0] != self.steps - 1):
+            checkpoints.append((self.steps - 1, state_hash(game)))
+        with open(path, "wb") as f:
+            f.write(REPLAY_MAGIC)
+            f.write(HEADER.pack(self.seed, self.dt, self.flags, self.hash_interval, self.steps, self.ai_budget))
+            balance = json.dumps(self.balance, sort_keys=True).encode()
+            f.write(struct.pack("<I", len(balance)))
+            f.write(balance)
+            f.write(struct.pack("<I", len(self.runs)))
+            for mask, count in self.runs:
+                f.write(RUN.pack(mask, count))
+            f.write(struct.pack("<I", len(checkpoints)))
+            for step, digest in checkpoints:
+                f.write(CHECKPOINT.pack(step, digest))
+
+
+class Recording:
+    """A loaded recording: header fields, the run-length encoded masks and the checkpoints"""
+    def __init__(self, seed, dt, flags, hash_interval, steps, runs, checkpoints, ai_budget=None, balance=None):
+        self.seed = seed
+        self.dt = dt
+        self.flags = flags
+        self.hash_interval = hash_interval
+        self.steps = steps
+        self.ai_budget = ai_budget  # None: the game's default
+        self.balance = balance or {}
+        self.runs = runs
+        self.checkpoints = checkpoints  # {step index: hash}
+
+    def masks(self):
+        for mask, count in self.runs:
+            for _ in range(count):
+                yield mask
+
+
+def load_recording(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic = data[:len(REPLAY_MAGIC)]
+    offset = len(REPLAY_MAGIC)
+    if magic == REPLAY_MAGIC:
+        seed, dt, flags, hash_interval, steps, ai_budget = HEADER.unpack_from(data, offset)
+        offset += HEADER.size
+        (length,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        balance = json.loads(data[offset:offset + length])
+        offset += length
+    elif magic == V1_MAGIC:
+        seed, dt, flags, hash_interval, steps = V1_HEADER.unpack_from(data, offset)
+        offset += V1_HEADER.size
+        ai_budget, balance = None, None
+    else:
+        raise ValueError(f"{path} is not a replay recording")
+    (run_count,) = struct.unpack_from("<I", data, offset)
+    offset += 4
+    runs = [RUN.unpack_from(data, offset + i * RUN.size) for i in range(run_count)]
+    offset += run_count * RUN.size
+    (checkpoint_count,) = struct.unpack_from("<I", data, offset)
+    offset += 4
+    checkpoints = dict(CHECKPOINT.unpack_from(data, offset + i * CHECKPOINT.size)
+                       for i in range(checkpoint_count))
+    return Recording(seed, dt, flags, hash_interval, steps, runs, checkpoints, ai_budget, balance)
+
+
+def replay(recording, keys, render=False, on_step=None):
+    """Run a recording through a fresh Game. Returns (game, first mismatching step or None).
+
+    on_step(step, game) is called after every step, e.g. to log per-step hashes.
+    """
+    import attack
+    import pygame
+    from render import present
+
+    attack.init()
+    ai_budget = recording.ai_budget if recording.ai_budget is not None else attack.AI_BUDGET
+    game = attack.Game(attack.screen, seed=recording.seed,
+                       use_swarm=bool(recording.flags & FLAG_SWARM),
+                       use_lod=bool(recording.flags & FLAG_LOD),
+                       balance=recording.balance, ai_budget=ai_budget)
+    key_states = {}
+    mismatch = None
+    for step, mask in enumerate(recording.masks()):
+        if mask & START_BIT:
+            game.start()
+        inputs = key_states.get(mask)
+        if inputs is None:
+            inputs = attack.KeyState([key for bit, key in enumerate(keys) if mask & (1 << bit)])
+            key_states[mask] = inputs
+        game.step(inputs, recording.dt)
+        if render:
+            pygame.event.pump()
+            game.draw()
+            present(attack.screen)
+        if on_step is not None:
+            on_step(step, game)
+        expected = recording.checkpoints.get(step)
+        if expected is not None and state_hash(game) != expected and mismatch is None:
+            mismatch = step
+    return game, mismatch
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded Attack On Heec session")
+    parser.add_argument("recording")
+    parser.add_argument("--render", action="store_true", help="draw every step in a window")
+    parser.add_argument("--hashes", help="write every step's state hash to this file")
+    parser.add_argument("--render-size", help="internal render resolution, e.g. 400x300")
+    parser.add_argument("--scale-mode", choices=["scaled", "integer"], help="how frames reach the window")
+    args = parser.parse_args()
+
+    if not args.render:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import attack
+
+    recording = load_recording(args.recording)
+    attack.init()
+    attack.load_sprite_atlas()
+    attack.preload_sprites()
+
+    hashes = open(args.hashes, "w") if args.hashes else None
+    on_step = None
+    if hashes is not None:
+        def on_step(step, game):
+            hashes.write(f"{step} {state_hash(game).hex()}\n")
+
+    start = time.perf_counter()
+    game, mismatch = replay(recording, attack.RECORDED_KEYS, args.render, on_step)
+    elapsed = time.perf_counter() - start
+    if hashes is not None:
+        hashes.close()
+
+    print(f"{recording.steps} steps in {elapsed:.2f} s ({recording.steps / max(elapsed, 1e-9):.0f} steps/s), "
+          f"{len(recording.checkpoints)} checkpoints, final hash {state_hash(game).hex()}")
+    if mismatch is not None:
+        print(f"State diverged from the recording by step {mismatch}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+class SpatialGrid:
+    """Uniform grid that buckets entities by the cells their rect overlaps.
+
+    Entities must have a ``rect``. Call ``move`` after an entity's rect changes
+    so its cells stay current; queries read the live rect for the exact test.
+    """
+    def __init__(self, cell_size=128):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.entity_cells = {}
+
+    def __len__(self):
+        return len(self.entity_cells)
+
+    def __contains__(self, entity):
+        return entity in self.entity_cells
+
+    def _cells_for(self, rect):
+        size = self.cell_size
+        x0, x1 = rect.left // size, (rect.right - 1) // size
+        y0, y1 = rect.top // size, (rect.bottom - 1) // size
+        return [(cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)]
+
+    def insert(self, entity):
+        cells = self._cells_for(entity.rect)
+        self.entity_cells[entity] = cells
+        for cell in cells:
+            # Dicts keep insertion order, so query results are deterministic
+            self.cells.setdefault(cell, {})[entity] = None
+
+    def remove(self, entity):
+        cells = self.entity_cells.pop(entity, None)
+        if cells is None:
+            return
+        for cell in cells:
+            bucket = self.cells[cell]
+            del bucket[entity]
+            if not bucket:
+                del self.cells[cell]
+
+    def move(self, entity):
+        old_cells = self.entity_cells.get(entity)
+        if old_cells is None:
+            self.insert(entity)
+            return
+        new_cells = self._cells_for(entity.rect)
+        if new_cells == old_cells:
+            return
+        self.remove(entity)
+        self.entity_cells[entity] = new_cells
+        for cell in new_cells:
+            self.cells.setdefault(cell, {})[entity] = None
+
+    def clear(self):
+        self.cells.clear()
+        self.entity_cells.clear()
+
+    def candidates(self, rect):
+        """Entities sharing a cell with rect, without the exact overlap test"""
+        found = {}
+        for cell in self._cells_for(rect):
+            bucket = self.cells.get(cell)
+            if bucket:
+                found.update(bucket)
+        return list(found)
+
+    def query_rect(self, rect):
+        return [entity for entity in self.candidates(rect) if entity.rect.colliderect(rect)]
+
+    def query_radius(self, x, y, radius):
+        """Entities whose rect centre lies within radius of (x, y)"""
+        size = self.cell_size
+        x0, x1 = int((x - radius) // size), int((x + radius) // size)
+        y0, y1 = int((y - radius) // size), int((y + radius) // size)
+        found = {}
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket:
+                    found.update(bucket)
+        radius_sq = radius * radius
+        result = []
+        for entity in found:
+            ex, ey = entity.rect.center
+            if (ex - x) ** 2 + (ey - y) ** 2 <= radius_sq:
+                result.append(entity)
+        return result
@@ -0,0 +1,173 @@
+import hashlib
+import os
+import queue
+import threading
+from collections import OrderedDict
+
+import pygame
+
+from atlas import asset_path
+
+DEFAULT_BUDGET = 32 * 1024 * 1024
+
+
+def scale_to_cover(image, size):
+    """Scale image to fill size without stretching, cropping the overflow evenly"""
+    width, height = size
+    factor = max(width / image.get_width(), height / image.get_height())
+    scaled_size = (max(width, round(image.get_width() * factor)),
+                   max(height, round(image.get_height() * factor)))
+    scaled = pygame.transform.smoothscale(image, scaled_size)
+    crop = pygame.Rect(0, 0, width, height)
+    crop.center = scaled.get_rect().center
+    return scaled.subsurface(crop).copy()
+
+
+def surface_bytes(surface):
+    return surface.get_pitch() * surface.get_height() if surface is not None else 0
+
+
+class AssetStreamer:
+    """Decodes and pre-scales large images on a worker thread within a memory budget.
+
+    request() queues a load and returns at once. poll() runs on the main thread
+    once a frame: it takes finished images off the completion queue, converts
+    them to the display format and makes them available through get(). A failed
+    load is remembered as None so it is not retried every frame.
+
+    Loaded surfaces are kept least recently used first; once they add up to more
+    than budget bytes the oldest are evicted. A prefetch that does not fit is
+    dropped instead of evicting anything, so it never pushes out an image in use.
+    Releasing an image that is still loading cancels it: the load finishes on the
+    worker but poll() throws the result away.
+    With a cache_dir, scaled images are also written there as BMP and read back
+    instead of decoding the source again.
+    """
+    def __init__(self, base_dir=".", budget=DEFAULT_BUDGET, cache_dir=None):
+        self.base_dir = base_dir
+        self.budget = budget
+        self.cache_dir = cache_dir
+        self.requests = queue.Queue()
+        self.completed = queue.Queue()
+        self.pending = set()
+        self.cancelled = set()  # Pending keys released before they arrived
+        self.prefetches = set()
+        self.surfaces = OrderedDict()
+        self.used = 0
+        self.stats = {"loads": 0, "disk_hits": 0, "evictions": 0, "failures": 0}
+        self.thread = None
+
+    def request(self, path, size=None, prefetch=False):
+        key = (path, size)
+        if not prefetch:
+            self.prefetches.discard(key)
+        self.cancelled.discard(key)
+        if key in self.surfaces or key in self.pending:
+            return
+        if prefetch:
+            self.prefetches.add(key)
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._work, name="asset-streamer", daemon=True)
+            self.thread.start()
+        self.pending.add(key)
+        self.requests.put(key)
+
+    def get(self, path, size=None):
+        key = (path, size)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+        return surface
+
+    def is_pending(self, path, size=None):
+        key = (path, size)
+        return key in self.pending and key not in self.cancelled
+
+    def release(self, path, size=None):
+        """Drop a surface that is no longer needed, or cancel its load if it has not arrived"""
+        key = (path, size)
+        if key in self.pending:
+            self.cancelled.add(key)
+            self.prefetches.discard(key)
+        surface = self.surfaces.pop(key, None)
+        self.used -= surface_bytes(surface)
+
+    def usage(self):
+        return dict(self.stats, surfaces=len(self.surfaces), bytes=self.used, budget=self.budget)
+
+    def poll(self):
+        """Pick up finished loads; returns how many arrived"""
+        arrived = 0
+        while True:
+            try:
+                key, image = self.completed.get_nowait()
+            except queue.Empty:
+                return arrived
+            self.pending.discard(key)
+            if key in self.cancelled:
+                self.cancelled.discard(key)
+                continue
+            # convert() needs the display, so it stays on the main thread
+            if image is not None and pygame.display.get_surface() is not None:
+                image = image.convert()
+            self.release(*key)
+            self.surfaces[key] = image
+            self.used += surface_bytes(image)
+            if key in self.prefetches:
+                self.prefetches.discard(key)
+                # Evicted first if it does not fit
+                self.surfaces.move_to_end(key, last=False)
+            self.evict()
+            arrived += 1
+
+    def evict(self):
+        # The last surface always stays, even if it alone is over budget
+        while self.used > self.budget and len(self.surfaces) > 1:
+            _, surface = self.surfaces.popitem(last=False)
+            self.used -= surface_bytes(surface)
+            self.stats["evictions"] += 1
+
+    def stop(self):
+        if self.thread is not None:
+            self.requests.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def cache_path(self, source, size):
+        """Disk cache file for source scaled to size; changes whenever the source does"""
+        stat = os.stat(source)
+        digest = hashlib.sha1(f"{source}|{size}|{stat.st_mtime_ns}|{stat.st_size}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest[:16]}.bmp")
+
+    def _load(self, path, size):
+        source = asset_path(self.base_dir, path)
+        cached = None
+        if self.cache_dir is not None and size is not None:
+            cached = self.cache_path(source, size)
+            if os.path.exists(cached):
+                self.stats["disk_hits"] += 1
+                return pygame.image.load(cached)
+        image = pygame.image.load(source)
+        self.stats["loads"] += 1
+        if size is not None:
+            image = scale_to_cover(image, size)
+        if cached is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Written under a temporary name so a reader never sees half a file
+            temp = cached[:-4] + ".tmp.bmp"
+            pygame.image.save(image, temp)
+            os.replace(temp, cached)
+        return image
+
+    def _work(self):
+        while True:
+            key = self.requests.get()
+            if key is None:
+                return
+            try:
+                image = self._load(*key)
+            except (pygame.error, OSError) as e:
+                print(f"Failed to stream image {key[0]}: {e}")
+                self.stats["failures"] += 1
+                image = None
+            self.completed.put((key, image))
@@ -0,0 +1,193 @@
+import numpy as np
+
+# Movement states and sprite states, stored as small integer codes
+STATE_IDLE, STATE_WALK, STATE_DEAD = 0, 1, 2
+STATE_NAMES = ["idle", "walk", "dead"]
+IMAGE_IDLE, IMAGE_WALK, IMAGE_ATTACK, IMAGE_HURT, IMAGE_DEAD = range(5)
+IMAGE_STATES = ["Idle", "Walk", "Attack", "Hurt", "Dead"]
+
+
+def round_like_rect(values):
+    """pygame 2 Rects round assigned floats half away from zero"""
+    return np.where(values >= 0, np.floor(values + 0.5), np.ceil(values - 0.5))
+
+
+class ZombieSwarm:
+    """Struct-of-arrays zombie horde updated with a handful of vectorised operations per tick.
+
+    Mirrors Zombie.update: nearest-player targeting, normalised chase movement,
+    attack start inside attack_range and the attack/idle reset. Slots are recycled
+    through a free list so a zombie keeps its slot for its whole life.
+    """
+    def __init__(self, capacity=64, attack_cooldown=1000, attack_duration=500, cell_size=None):
+        self.attack_cooldown = attack_cooldown
+        self.attack_duration = attack_duration
+        self.cell_size = cell_size
+        self.capacity = 0
+        self.next_order = 0
+        self.free = []
+        self.field_arrays = {}  # id(flow field) -> (version, next_x, next_y)
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        old = self.capacity
+        fields = {
+            "x": np.int64, "y": np.int64, "w": np.int64, "h": np.int64,
+            "prev_x": np.int64, "prev_y": np.int64,
+            "speed": np.float64, "health": np.int64, "max_health": np.int64,
+            "damage": np.int64, "attack_range": np.float64,
+            "last_attack_time": np.float64, "is_attacking": np.bool_, "anim_start": np.float64,
+            "facing_right": np.bool_, "state": np.int8, "image_state": np.int8,
+            "alive": np.bool_, "order": np.int64,
+        }
+        for name, dtype in fields.items():
+            array = np.zeros(capacity, dtype=dtype)
+            if old:
+                array[:old] = getattr(self, name)
+            setattr(self, name, array)
+        # Hand out low slots first
+        self.free.extend(range(capacity - 1, old - 1, -1))
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.capacity - len(self.free)
+
+    def add(self, x, y, w, h, health, damage, speed, attack_range, now=0):
+        if not self.free:
+            self._allocate(self.capacity * 2)
+        slot = self.free.pop()
+        self.x[slot], self.y[slot] = x, y
+        self.prev_x[slot], self.prev_y[slot] = x, y
+        self.w[slot], self.h[slot] = w, h
+        self.health[slot] = self.max_health[slot] = health
+        self.damage[slot] = damage
+        self.speed[slot] = speed
+        self.attack_range[slot] = attack_range
+        self.last_attack_time[slot] = 0
+        self.is_attacking[slot] = False
+        self.facing_right[slot] = True
+        self.state[slot] = STATE_IDLE
+        self.image_state[slot] = IMAGE_IDLE
+        self.anim_start[slot] = now
+        self.alive[slot] = True
+        self.order[slot] = self.next_order
+        self.next_order += 1
+        return slot
+
+    def remove(self, slot):
+        if self.alive[slot]:
+            self.alive[slot] = False
+            self.free.append(slot)
+
+    def clear(self):
+        self.alive[:] = False
+        self.free = list(range(self.capacity - 1, -1, -1))
+
+    def set_image_state(self, slot, image_state, now):
+        """Switch a zombie's animation, restarting it only on an actual change"""
+        if self.image_state[slot] != image_state:
+            self.image_state[slot] = image_state
+            self.anim_start[slot] = now
+
+    def steering(self, field):
+        """A flow field's next-step tables as arrays, converted once per rebuild"""
+        cached = self.field_arrays.get(id(field))
+        if cached is None or cached[0] != field.version:
+            cached = (field.version, np.array(field.next_x), np.array(field.next_y))
+            self.field_arrays[id(field)] = cached
+        return cached[1], cached[2]
+
+    def update(self, player1_center, player2_center, now, flow_fields=None):
+        """Advance every live zombie one tick.
+
+        With flow_fields (one FlowField per player), zombies steer along their
+        target's field wherever it has a next step, as Zombie.update does.
+
+        Returns (hits, dead, moved). hits holds (slot, target) pairs, sorted by the
+        order field (spawn order unless the caller overrides it), for attacks that
+        started close enough to land; target is 0 or 1, and the
+        caller still checks that player's vulnerability. dead holds slots of dead
+        zombies. moved holds slots whose grid cells changed (only when cell_size is set).
+        """
+        slots = np.flatnonzero(self.alive)
+        dead = slots[self.state[slots] == STATE_DEAD]
+        slots = slots[self.state[slots] != STATE_DEAD]
+        if not len(slots):
+            return [], dead.tolist(), []
+
+        x, y = self.x[slots], self.y[slots]
+        w, h = self.w[slots], self.h[slots]
+        cx, cy = x + w // 2, y + h // 2
+
+        # Find closest player
+        p1x, p1y = player1_center
+        p2x, p2y = player2_center
+        dist1 = np.hypot(cx - p1x, cy - p1y)
+        dist2 = np.hypot(cx - p2x, cy - p2y)
+        targets_p1 = dist1 <= dist2
+        distance = np.minimum(dist1, dist2)
+
+        # Movement direction
+        dx = np.where(targets_p1, p1x, p2x) - cx
+        dy = np.where(targets_p1, p1y, p2y) - cy
+        norm = np.maximum(1, np.hypot(dx, dy))
+        dx, dy = dx / norm, dy / norm
+        if flow_fields is not None:
+            for field, chasing in zip(flow_fields, (targets_p1, ~targets_p1)):
+                next_x, next_y = self.steering(field)
+                col = (cx - field.left) // field.cell_size
+                row = (cy - field.top) // field.cell_size
+                inside = chasing & (col >= 0) & (col < field.cols) & (row >= 0) & (row < field.rows)
+                index = np.where(inside, row * field.cols + col, 0)
+                step_x, step_y = next_x[index] - cx, next_y[index] - cy
+                steer = inside & ~np.isnan(step_x)
+                step_norm = np.maximum(1, np.hypot(step_x, step_y))
+                dx = np.where(steer, step_x / step_norm, dx)
+                dy = np.where(steer, step_y / step_norm, dy)
+        self.facing_right[slots] = dx > 0
+
+        # Combat logic
+        attack_range = self.attack_range[slots]
+        in_range = distance <= attack_range
+        is_attacking = self.is_attacking[slots]
+        last_attack = self.last_attack_time[slots]
+        starts = in_range & ~is_attacking & (now - last_attack > self.attack_cooldown)
+        is_attacking |= starts
+        last_attack = np.where(starts, now, last_attack)
+        image_state = np.where(starts, IMAGE_ATTACK, self.image_state[slots])
+        landed = starts & (distance < attack_range * 0.8)
+
+        walking = ~in_range
+        speed = self.speed[slots]
+        new_x = np.where(walking, round_like_rect(x + dx * speed), x).astype(np.int64)
+        new_y = np.where(walking, round_like_rect(y + dy * speed), y).astype(np.int64)
+        self.state[slots[walking]] = STATE_WALK
+        image_state = np.where(walking, IMAGE_WALK, image_state)
+
+        # Reset attack state
+        resets = is_attacking & (now - last_attack > self.attack_duration)
+        is_attacking &= ~resets
+        image_state = np.where(resets, IMAGE_IDLE, image_state)
+
+        self.is_attacking[slots] = is_attacking
+        self.last_attack_time[slots] = last_attack
+        self.anim_start[slots[image_state != self.image_state[slots]]] = now
+        self.image_state[slots] = image_state
+
+        moved = []
+        if self.cell_size is not None:
+            size = self.cell_size
+            changed = ((x // size != new_x // size) | (y // size != new_y // size) |
+                       ((x + w - 1) // size != (new_x + w - 1) // size) |
+                       ((y + h - 1) // size != (new_y + h - 1) // size))
+            moved = slots[changed].tolist()
+        self.prev_x[slots] = x
+        self.prev_y[slots] = y
+        self.x[slots] = new_x
+        self.y[slots] = new_y
+
+        hit_slots = slots[landed]
+        hit_targets = np.where(targets_p1[landed], 0, 1)
+        order = np.argsort(self.order[hit_slots], kind="stable")
+        hits = list(zip(hit_slots[order].tolist(), hit_targets[order].tolist()))
+        return hits, dead.tolist(), moved